@@ -1,2 +1,11 @@
 """Init for Bot."""
-from .__main__ import reminder_worker, main
+
+__all__ = ["reminder_worker", "main"]
+
+
+def __getattr__(name):
+    """Import entry points only when they are used, importing submodules stays cheap."""
+    if name in __all__:
+        from Bot import __main__
+        return getattr(__main__, name)
+    raise AttributeError(f"module 'Bot' has no attribute {name!r}")
@@ -1,75 +1,83 @@
 """Initialize client run bot."""
-import supabase as sb
 import logging
 import sys
 import asyncio
 
 from Bot.config import config
-from Bot.handlers import router, _
-
-from aiogram import Bot, Dispatcher, F
-from aiogram.enums import ParseMode
-from aiogram.filters import CommandStart
-from aiogram.types import Message, CallbackQuery
-from aiogram.client.default import DefaultBotProperties
-from aiogram.types.inline_keyboard_button import InlineKeyboardButton
-from aiogram.utils.keyboard import InlineKeyboardBuilder
-from aiogram.fsm.storage.memory import MemoryStorage
-from aiogram.fsm.context import FSMContext
-from aiogram.fsm.state import StatesGroup, State
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from datetime import datetime, timedelta
+from Bot.digest import start_digest
+from Bot.handlers import router, background, REFERENCE, REMINDERS, INLINE_INDEX, run_broadcast
+from Bot.i18n import gettext as _, LocaleMiddleware, use_locale
+from Bot.metrics import setup_metrics, start_metrics_server
+from Bot.recorder import UpdateRecorder
+from Bot.reminders import parse_time
+from Bot.services import get_bot, get_storage, LOCALES, REPO
+from Bot.throttling import ThrottlingMiddleware, setup_throttling
+from Bot.webhook import run_webhook
+
+from aiogram import Dispatcher
 import pytz
 
-TOKEN = config.bot_token.get_secret_value()
-
-
-STORAGE = MemoryStorage()
-dp = Dispatcher(storage=STORAGE)
 
-
-URL = config.url.get_secret_value()
-KEY = config.key.get_secret_value()
-CLIENT = sb.create_client(URL, KEY)
+async def send_reminder(telegram_id, rows):
+    """Send one message with reminders about the deadlines."""
+    moscow_tz = pytz.timezone('Europe/Moscow')
+    use_locale(await LOCALES.get(int(telegram_id)))
+    texts = []
+    for row in rows:
+        deadline = parse_time(row["deadline_at"])
+        texts.append(_("Напоминание!\n<b>{title}</b>\nДедлайн в ").format(title=row['title']) +
+                     f"{deadline.astimezone(moscow_tz).strftime('%H:%M %d.%m.%Y')}")
+    await get_bot().send_message(telegram_id, "\n\n".join(texts))
 
 
 async def reminder_worker():
-    """Check dealines each 60 sec and remind."""
-    while True:
-        now = datetime.now(pytz.UTC)
-        moscow_tz = pytz.timezone('Europe/Moscow')
-
-        response = CLIENT.table("deadlines").select(
-            "*").eq("notified", False).gt("deadline_at", now.isoformat()).execute()
-
-        for row in response.data:
-            deadline = datetime.fromisoformat(row["deadline_at"]).replace(tzinfo=pytz.UTC)
-            delta = deadline - now
+    """Remind about deadlines when they are due."""
+    await REMINDERS.run(send_reminder)
 
-            if timedelta(minutes=0) < delta <= timedelta(minutes=1):
-                text = (_("Напоминание!\n<b>{title}</b>\nДедлайн в ").format(title=row['title']) +
-                        f"{deadline.astimezone(moscow_tz).strftime('%H:%M %d.%m.%Y')}")
 
-                try:
-                    await BOT.send_message(row["telegram_id"], text)
-                    CLIENT.table("deadlines").update({"notified": True}).eq("id", row["id"]).execute()
-                except Exception as e:
-                    print(f"Ошибка отправки уведомления: {e}")
+async def broadcast_worker(broadcasts):
+    """Finish broadcasts interrupted by restart.
 
-        await asyncio.sleep(60)
+    Broadcasts leased by other processes are checked again when their lease
+    expires, in case that process died.
+    """
+    while broadcasts:
+        held = {broadcast["id"] for broadcast in broadcasts if not await run_broadcast(get_bot(), broadcast)}
+        if held:
+            await asyncio.sleep(config.broadcast_lease + 1)
+            broadcasts = [broadcast for broadcast in await REPO.unfinished_broadcasts() if broadcast["id"] in held]
+        else:
+            broadcasts = []
 
 
 async def main() -> None:
     """Run bot."""
+    dp = Dispatcher(storage=get_storage())
+    if config.record_updates:
+        dp.update.outer_middleware(UpdateRecorder(config.record_updates))
+    setup_metrics(dp)
+    dp.update.outer_middleware(LocaleMiddleware())
+    setup_throttling(dp, ThrottlingMiddleware(config.throttle_rate, config.throttle_burst,
+                                              config.throttle_window, config.throttle_limits))
     dp.include_router(router)
-    asyncio.create_task(reminder_worker())
-    await dp.start_polling(BOT)
+    await asyncio.gather(REFERENCE.ensure_loaded(), INLINE_INDEX.ensure_built())
+    background(REFERENCE.refresh_forever(config.reference_refresh))
+    background(reminder_worker())
+    if config.digest_time:
+        start_digest(get_bot().send_message, config.digest_time, config.broadcast_rate)
+    background(broadcast_worker(await REPO.unfinished_broadcasts()))  # до приёма новых команд
+    if config.metrics_port:
+        await start_metrics_server(config.metrics_host, config.metrics_port)
+    if config.mode == "webhook":
+        secret = config.webhook_secret.get_secret_value() if config.webhook_secret else None
+        await run_webhook(dp, get_bot(), config.webhook_base_url, config.webhook_path,
+                          config.webhook_host, config.webhook_port, secret)
+    else:
+        await dp.start_polling(get_bot())
 
 
 def start_bot() -> None:
     """Start bot."""
-    global BOT
-    BOT = Bot(token=TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     logging.basicConfig(level=logging.INFO, stream=sys.stdout)
     asyncio.run(main())
 
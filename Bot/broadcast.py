@@ -0,0 +1,113 @@
+"""Messages to every registered user."""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from Bot.reminders import worker_name
+
+
+class RateLimiter:
+    """Keep sending within the global and per-chat limits of Telegram."""
+
+    def __init__(self, rate=25, per_chat=1.0):
+        """Send at most rate messages per second, one per chat in per_chat seconds."""
+        self.interval = 1 / rate
+        self.per_chat = per_chat
+        self._next = 0.0  # когда можно отправить следующее сообщение
+        self._chats = {}  # чат -> когда ему можно отправить следующее сообщение
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, chat_id):
+        """Wait for a slot to send a message to the chat."""
+        async with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next, self._chats.get(chat_id, 0))
+            self._next = at + self.interval
+            self._chats[chat_id] = at + self.per_chat
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    def pause(self, seconds):
+        """Stop all sending for seconds, Telegram asked to wait."""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class Broadcaster:
+    """Send a message to every registered user.
+
+    Recipients are saved in the database with the broadcast and marked
+    after every batch, so a restarted bot continues unfinished broadcasts
+    instead of sending them again. A broadcast is leased by the process
+    sending it and the lease is renewed before every batch, so of several
+    processes only one sends it, and another one takes over when the lease
+    of a dead process expires.
+    """
+
+    def __init__(self, repo, rate=25, batch=100, attempts=3, lease=timedelta(minutes=2), worker=None):
+        """Send at most rate messages per second, save progress every batch messages.
+
+        The broadcast is held for lease after every claim, worker names this process.
+        """
+        self.repo = repo
+        self.rate = rate
+        self.batch = batch
+        self.attempts = attempts
+        self.lease = lease
+        self.worker = worker or worker_name()
+
+    async def create(self, text, created_by):
+        """Save broadcast with all registered users as recipients, return it and their number."""
+        broadcast = (await self.repo.create_broadcast(text, created_by))[0]
+        tg_ids = await self.repo.registered_tg_ids()
+        await self.repo.add_broadcast_recipients(broadcast["id"], tg_ids)
+        return broadcast, len(tg_ids)
+
+    async def claim(self, broadcast_id):
+        """Lease the broadcast or renew the lease, False if another process holds it."""
+        now = datetime.now(timezone.utc)
+        return await self.repo.claim_broadcast(broadcast_id, self.worker, now.isoformat(), (now + self.lease).isoformat())
+
+    async def _send(self, limiter, send, tg_id, text):
+        """Send message to one user, return whether it was delivered."""
+        for attempt in range(self.attempts):
+            await limiter.acquire(tg_id)
+            try:
+                await send(int(tg_id), text)
+                return True
+            except TelegramRetryAfter as e:
+                limiter.pause(e.retry_after)
+            except (TelegramForbiddenError, TelegramBadRequest):
+                return False  # пользователь заблокировал бота или чата нет
+            except Exception as e:
+                print(f"Ошибка рассылки: {e}")
+                await asyncio.sleep(2 ** attempt)
+        return False
+
+    async def run(self, broadcast, send):
+        """Send pending messages of the broadcast with send(chat_id, text) coroutine, return counters.
+
+        Return None if the broadcast is sent by another process.
+        """
+        limiter = RateLimiter(self.rate)
+        start = time.perf_counter()
+        delivered = 0
+        while True:
+            if not await self.claim(broadcast["id"]):
+                return None
+            tg_ids = await self.repo.pending_recipients(broadcast["id"], self.batch)
+            if not tg_ids:
+                break
+            results = await asyncio.gather(*(self._send(limiter, send, tg_id, broadcast["text"]) for tg_id in tg_ids))
+            sent = [tg_id for tg_id, ok in zip(tg_ids, results) if ok]
+            failed = [tg_id for tg_id, ok in zip(tg_ids, results) if not ok]
+            if sent:
+                await self.repo.set_recipients_status(broadcast["id"], sent, "sent")
+            if failed:
+                await self.repo.set_recipients_status(broadcast["id"], failed, "failed")
+            delivered += len(sent)
+        await self.repo.finish_broadcast(broadcast["id"])
+        elapsed = time.perf_counter() - start
+        counts = await self.repo.broadcast_counts(broadcast["id"])
+        return {"sent": counts.get("sent", 0), "failed": counts.get("failed", 0),
+                "rate": delivered / elapsed if elapsed else 0.0}
@@ -0,0 +1,70 @@
+"""Caches."""
+import time
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Rendered messages with time to live.
+
+    Counts hits and misses, so it is easy to check that the cache works.
+    """
+
+    def __init__(self, ttl):
+        """Keep values for ttl seconds."""
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = {}
+
+    def get(self, key):
+        """Get value or None if it is missing or expired."""
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item[1]
+
+    def put(self, key, value):
+        """Save value."""
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self):
+        """Drop all values."""
+        self._data.clear()
+
+    def stats(self):
+        """Get counters and size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class LRUCache:
+    """Keep at most maxsize recently used values."""
+
+    def __init__(self, maxsize):
+        """Keep maxsize values."""
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key):
+        """Get value or None."""
+        value = self._data.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Save value, drop the least recently used one if full."""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def stats(self):
+        """Get counters and size."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
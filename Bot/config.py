@@ -1,7 +1,10 @@
 """Read .env."""
+import functools
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import SecretStr
 from pathlib import Path
+from datetime import date
+from typing import Literal
 
 
 class Settings(BaseSettings):
@@ -10,7 +13,72 @@ class Settings(BaseSettings):
     bot_token: SecretStr
     url: SecretStr
     key: SecretStr
+    db_workers: int = 8  # сколько запросов к БД может выполняться одновременно
+    admin_ids: list[int] = []  # telegram id администраторов
+    schedule_cache_ttl: int = 3600  # сколько секунд хранить готовое расписание
+    profile_cache_size: int = 1024  # сколько профилей пользователей держать в памяти
+    homework_page_size: int = 5  # сколько заданий показывать на одной странице
+    deadlines_page_size: int = 10  # сколько дедлайнов показывать на одной странице
+    reference_refresh: int = 300  # как часто перечитывать справочники (предметы, кабинеты, ...)
+    reminder_horizon: int = 3600  # на сколько секунд вперёд держать напоминания в памяти
+    reminder_concurrency: int = 20  # сколько напоминаний отправлять одновременно
+    reminder_offsets: list[int] = [1440, 180, 15]  # за сколько минут до дедлайна напоминать
+    reminder_lease: int = 300  # на сколько секунд воркер занимает напоминания перед отправкой
+    worker_id: str = ""  # имя процесса в очереди напоминаний, по умолчанию хост:pid
+    semester_start: date = date(2026, 9, 1)  # первый день семестра, его неделя нечётная
+    semester_weeks: int = 18  # сколько недель в семестре, до конца повторяются пары в календаре
+    inline_cache_time: int = 300  # сколько секунд Telegram может хранить ответы на inline-запросы
+    digest_time: str = "07:30"  # во сколько (по Москве) присылать ежедневную сводку, пусто - не присылать
+    broadcast_rate: float = 25  # сообщений в секунду при рассылке, у Telegram предел около 30
+    broadcast_batch: int = 100  # после скольких сообщений сохранять прогресс рассылки
+    broadcast_lease: int = 120  # на сколько секунд процесс занимает рассылку, продлевается перед каждой пачкой
+    throttle_rate: float = 1  # сколько действий в секунду в среднем разрешено одному пользователю
+    throttle_burst: int = 5  # сколько действий подряд разрешено без ожидания
+    throttle_window: float = 1  # сколько секунд после нажатия кнопки повторные нажатия игнорируются
+    throttle_limits: dict[str, tuple[float, int]] = {"schedule": (0.5, 3)}  # свои (rate, burst) для групп обработчиков
+    fsm_storage: Literal["memory", "sqlite", "redis"] = "memory"  # где хранить состояния диалогов
+    fsm_storage_url: str = ""  # путь к файлу SQLite или адрес redis://
+    mode: Literal["polling", "webhook"] = "polling"  # как получать обновления от Telegram
+    webhook_base_url: str = ""  # внешний адрес бота, например https://bot.example.com
+    webhook_path: str = "/webhook"
+    webhook_host: str = "0.0.0.0"
+    webhook_port: int = 8080
+    webhook_secret: SecretStr | None = None  # проверяется в заголовке X-Telegram-Bot-Api-Secret-Token
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0  # порт для /metrics, 0 - не запускать
+    record_updates: str = ""  # файл JSONL для записи входящих апдейтов, пусто - не записывать
     model_config = SettingsConfigDict(env_file=Path(__file__).parent / '.env', env_file_encoding='utf-8')
 
 
-config = Settings()
+class Lazy:
+    """Proxy to the object made by factory on first attribute access."""
+
+    def __init__(self, factory):
+        """Call factory once when the object is needed."""
+        object.__setattr__(self, "_factory", factory)
+
+    def _target(self):
+        if "_object" not in self.__dict__:
+            object.__setattr__(self, "_object", self._factory())
+        return self.__dict__["_object"]
+
+    def __getattr__(self, name):
+        """Get attribute of the object."""
+        return getattr(self._target(), name)
+
+    def __setattr__(self, name, value):
+        """Set attribute of the object."""
+        setattr(self._target(), name, value)
+
+    def __delattr__(self, name):
+        """Delete attribute of the object."""
+        delattr(self._target(), name)
+
+
+@functools.cache
+def get_settings():
+    """Read settings from environment and .env once."""
+    return Settings()
+
+
+config = Lazy(get_settings)  # .env читается при первом обращении, а не при импорте
@@ -0,0 +1,93 @@
+"""Daily digest of today's pairs, homework and deadlines."""
+import asyncio
+from datetime import datetime, timedelta
+
+from Bot.broadcast import RateLimiter
+from Bot import handlers
+from Bot.config import config
+from Bot.handlers import moscow_tz, week_days
+from Bot.i18n import gettext as _, use_locale
+from Bot.reminders import parse_time
+from Bot.semester import week_parity
+
+
+def format_homework(homeworks):
+    """Make digest part with homework."""
+    if not homeworks:
+        return _("<b>Домашнее задание на 2 дня:</b> нет")
+    lines = [_("<b>Домашнее задание на 2 дня:</b>")]
+    for hw in homeworks:
+        subject = handlers.REFERENCE.subject_name(hw["subject_id"]) or ""
+        lines.append(f"• {subject}: {hw['description']} ({hw['due_date'][8:10]}.{hw['due_date'][5:7]})")
+    return "\n".join(lines)
+
+
+def format_deadlines(deadlines):
+    """Make digest part with deadlines of one user."""
+    if not deadlines:
+        return _("<b>Дедлайны на 2 дня:</b> нет")
+    lines = [_("<b>Дедлайны на 2 дня:</b>")]
+    for deadline in deadlines:
+        at = parse_time(deadline["deadline_at"]).astimezone(moscow_tz)
+        lines.append(f"• {deadline['title']} — {at.strftime('%H:%M %d.%m')}")
+    return "\n".join(lines)
+
+
+async def send_digest(send, now, rate=25):
+    """Send digest to all subscribers with send(chat_id, text) coroutine, return number of sent messages.
+
+    Data of all subscribers is read in a few queries, the common part is
+    rendered once per locale. Every bot process runs the job, the digest of
+    a day is sent only by the one that claims it first.
+    """
+    subscribers = await handlers.REPO.digest_subscribers()
+    if not subscribers or not await handlers.REPO.claim_digest(now.date().isoformat()):
+        return 0
+    await handlers.REFERENCE.ensure_loaded()
+    today = now.date()
+    homeworks, deadlines = await asyncio.gather(
+        handlers.REPO.homework_due(today.isoformat(), (today + timedelta(days=2)).isoformat()),
+        handlers.REPO.deadlines_between([int(tg_id) for tg_id in subscribers], now.isoformat(), (now + timedelta(hours=48)).isoformat()))
+
+    locales = await handlers.LOCALES.many(int(tg_id) for tg_id in subscribers)
+    by_user = {}
+    for deadline in deadlines:
+        by_user.setdefault(deadline["telegram_id"], []).append(deadline)
+
+    common = {}  # локаль -> расписание и ДЗ
+    parity = week_parity(today, config.semester_start)
+    for locale in set(locales.values()):
+        use_locale(locale)
+        # те же пары, что в /today: только пары текущей чётности недели
+        schedule = (await week_days(parity, locale))[today.isoweekday()][1]
+        common[locale] = _("<b>Доброе утро!</b>\n\n") + schedule + "\n\n" + format_homework(homeworks)
+
+    limiter = RateLimiter(rate)
+
+    async def deliver(tg_id):
+        locale = locales[int(tg_id)]
+        use_locale(locale)
+        await limiter.acquire(tg_id)
+        try:
+            await send(int(tg_id), common[locale] + "\n\n" + format_deadlines(by_user.get(int(tg_id), [])))
+            return True
+        except Exception as e:
+            print(f"Ошибка отправки сводки: {e}")
+            return False
+
+    return sum(await asyncio.gather(*(deliver(tg_id) for tg_id in subscribers)))
+
+
+def start_digest(send, at, rate=25):
+    """Send digest every day at "HH:MM" Moscow time, return started scheduler."""
+    from apscheduler.schedulers.asyncio import AsyncIOScheduler  # нужен только запущенному боту
+    from apscheduler.triggers.cron import CronTrigger
+
+    async def job():
+        await send_digest(send, datetime.now(moscow_tz), rate)
+
+    hour, minute = map(int, at.split(":"))
+    scheduler = AsyncIOScheduler(timezone=moscow_tz)
+    scheduler.add_job(job, CronTrigger(hour=hour, minute=minute, timezone=moscow_tz), misfire_grace_time=600, coalesce=True)
+    scheduler.start()
+    return scheduler
@@ -2,36 +2,57 @@
 import asyncio
 import pytz
 from datetime import datetime, timedelta
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from aiogram.fsm.state import StatesGroup, State
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from aiogram.types.inline_keyboard_button import InlineKeyboardButton
-from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup
+from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineQuery
 from aiogram.filters import CommandStart, Command, CommandObject, StateFilter
-import supabase as sb
-import gettext
-import os
-
-from Bot.config import config
+from aiogram.filters.callback_data import CallbackData
+
+from Bot import metrics
+from Bot.config import config, Lazy
+from Bot.i18n import gettext as _, ngettext, current_locale, use_locale, LocaleStore
+from Bot.services import REPO, LOCALES
+from Bot.cache import RenderCache, LRUCache
+from Bot.reference import ReferenceData
+from Bot.reminders import ReminderScheduler, parse_time, reminder_entries
+from Bot.broadcast import Broadcaster
+from Bot.inline import ScheduleIndex, day_names
+from Bot.semester import week_number, week_parity
+from Bot.ics import ScheduleCalendar
 
 from aiogram import F, Router
 
 
 router = Router()
 
-URL = config.url.get_secret_value()
-KEY = config.key.get_secret_value()
-
-CLIENT = sb.create_client(URL, KEY)
+SCHEDULE_CACHE = Lazy(lambda: RenderCache(ttl=config.schedule_cache_ttl))  # (день, чётность недели, локаль) -> сообщение
+PROFILES = Lazy(lambda: LRUCache(maxsize=config.profile_cache_size))  # tg_id -> строка из users
+metrics.Counter("bot_schedule_cache_hits_total", "Schedule cache hits.", fn=lambda: SCHEDULE_CACHE.hits)
+metrics.Counter("bot_schedule_cache_misses_total", "Schedule cache misses.", fn=lambda: SCHEDULE_CACHE.misses)
+metrics.Counter("bot_profile_cache_hits_total", "Profile cache hits.", fn=lambda: PROFILES.hits)
+metrics.Counter("bot_profile_cache_misses_total", "Profile cache misses.", fn=lambda: PROFILES.misses)
+INLINE_INDEX = ScheduleIndex(REPO, lambda pairs, day: format_schedule(pairs, day))
+CALENDAR = ScheduleCalendar(REPO)
+
+
+def schedule_changed():
+    """Drop everything rendered from the schedule."""
+    SCHEDULE_CACHE.invalidate()
+    INLINE_INDEX.invalidate()
+    CALENDAR.invalidate()
+
+
+REFERENCE = ReferenceData(REPO, on_change=schedule_changed)
+REMINDERS = Lazy(lambda: ReminderScheduler(REPO, horizon=timedelta(seconds=config.reminder_horizon),
+                                           concurrency=config.reminder_concurrency,
+                                           lease=timedelta(seconds=config.reminder_lease), worker=config.worker_id or None))
+BROADCASTS = Lazy(lambda: Broadcaster(REPO, rate=config.broadcast_rate, batch=config.broadcast_batch,
+                                      lease=timedelta(seconds=config.broadcast_lease), worker=config.worker_id or None))
+BACKGROUND = set()  # фоновые задачи, чтобы их не собрал сборщик мусора
 moscow_tz = pytz.timezone("Europe/Moscow")
 
-locales_path = os.path.join(os.path.dirname(__file__), 'locales')
-translation = gettext.translation("TG_bot", localedir=locales_path, fallback=True)
-_, ngettext = translation.gettext, translation.ngettext
-
-user_langs = {}  # локаль по идентификатору пользователя
-
 
 class Registration(StatesGroup):
     """Fields to be complited during registartion."""
@@ -50,6 +71,22 @@ class HomeWork(StatesGroup):
     viewing_homeworks = State()  # Пользователь хочет посмотреть текущие ДЗ
 
 
+class HomeworkPage(CallbackData, prefix="hwp"):
+    """Button of homework pages navigation."""
+
+    subject_id: int
+    due: str = ""  # курсор (due_date, id): пустой для первой страницы
+    id: int = 0
+    back: bool = False  # листать назад от курсора
+    archive: bool = False  # показывать прошедшие задания
+
+
+class DeadlinesPage(CallbackData, prefix="dlp"):
+    """Button of deadlines list navigation."""
+
+    page: int
+
+
 class AddDeadline(StatesGroup):
     """States for cgreating new deadlines."""
 
@@ -58,28 +95,12 @@ class AddDeadline(StatesGroup):
     waiting_for_title = State()
 
 
-def set_locale(locale_name):
-    """Set locale for particular user."""
-    locales_path = os.path.join(os.path.dirname(__file__), 'locales')
-
-    try:
-        translation = gettext.translation(
-            "TG_bot",
-            localedir=locales_path,
-            languages=[locale_name],
-            fallback=True
-        )
-        translation.install()
-        global _
-        global ngettext
-        _ = translation.gettext
-        ngettext = translation.ngettext
-    except Exception as e:
-        print(f"Locale error: {e}")
-        translation = gettext.NullTranslations()
-        translation.install()
-        _ = translation.gettext
-        ngettext = translation.ngettext
+def background(coro):
+    """Start task and keep a reference to it until it is done."""
+    task = asyncio.create_task(coro)
+    BACKGROUND.add(task)
+    task.add_done_callback(BACKGROUND.discard)
+    return task
 
 
 @router.message(CommandStart())
@@ -102,8 +123,8 @@ async def command_start_handler(message: Message, state: FSMContext) -> None:
 async def start_registration(callback: CallbackQuery, state: FSMContext):
     """Choose language and start registration."""
     lang = callback.data.split("-")[1]
-    user_langs[callback.from_user.id] = lang
-    set_locale(lang)
+    await LocaleStore(state.storage).set(callback.from_user.id, lang)  # хранилище общее для всех процессов
+    use_locale(lang)
     await callback.message.answer(_("Отлично, вы выбрали лучший язык в мире!"))
 
     registration = InlineKeyboardBuilder()
@@ -117,13 +138,30 @@ async def start_registration(callback: CallbackQuery, state: FSMContext):
     )
 
 
+async def get_profile(tg_id, tg_username):
+    """Get user profile from cache or database, None if user is not registered."""
+    profile = PROFILES.get(tg_id)
+    if profile is None:
+        rows = await REPO.user(str(tg_id), str(tg_username))
+        if not rows:
+            return None
+        profile = next((row for row in rows if row['tg_id'] == str(tg_id)), rows[0])
+        if profile['tg_id'] != str(tg_id):
+            # пользователь добавлен заранее только по username, привязываем его tg_id
+            bound = await REPO.bind_tg_id(str(tg_username), str(tg_id))
+            if not bound:
+                # строку изменили или удалили после выборки, в кэш не кладём, проверим в следующий раз
+                return {**profile, "tg_id": str(tg_id)}
+            profile = bound[0]
+        PROFILES.put(tg_id, profile)
+    return profile
+
+
 @router.callback_query(F.data == 'registration')
 async def registration(callback: CallbackQuery, state: FSMContext):
     """Start of registartion."""
-    print(str(callback.from_user.username))
-    same_user = CLIENT.table("users").select("*").eq("tg_username", str(callback.from_user.username)).execute().data
-    if same_user:
-        print('SAAAAME')
+    profile = await get_profile(callback.from_user.id, callback.from_user.username)
+    if profile:
         check = InlineKeyboardBuilder()
         check.add(InlineKeyboardButton(
             text=_("Всё верно"),
@@ -133,7 +171,7 @@ async def registration(callback: CallbackQuery, state: FSMContext):
             text=_('Редактировать'),
             callback_data='fix'
         ))
-        name = same_user[0]['name']
+        name = profile['name']
         await callback.message.answer(_("Вы уже зарегестрированы со следующими данными.\n\nФИО: {name}").format(name=name),
                                       reply_markup=check.as_markup())
         return
@@ -146,17 +184,17 @@ async def registration(callback: CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == 'fix')
 async def fix_registration(callback: CallbackQuery, state: FSMContext):
     """Start registration from the beginning."""
-    CLIENT.table("users").delete().eq("tg_username", str(callback.from_user.username)).execute()
+    # Старая запись остаётся до ввода нового ФИО и заменяется в process_name
     await callback.message.answer(_('Введите ваше ФИО:'))
     await state.set_state(Registration.name)
 
 
 @router.message(F.text, Registration.name)
 async def process_name(message: Message, state: FSMContext):
-    """Add user."""
-    CLIENT.table("users").insert({"tg_id": str(message.from_user.id),
-                                  "name": message.text,
-                                  "tg_username": message.from_user.username}).execute()
+    """Add or update user."""
+    rows = await REPO.save_user(str(message.from_user.id), message.text, message.from_user.username)
+    if rows:
+        PROFILES.put(message.from_user.id, rows[0])
     await message.answer(_("Отлично!"))
     await state.clear()
 
@@ -164,8 +202,6 @@ async def process_name(message: Message, state: FSMContext):
 @router.callback_query(F.data == 'right')
 async def wait(callback: CallbackQuery, state: FSMContext):
     """Standart response."""
-    tg_id, tg_username = str(callback.from_user.id), str(callback.from_user.username)
-    CLIENT.table("users").update({"tg_id": tg_id}).eq("tg_username", tg_username).execute()
     await callback.message.answer(_('Отлично!'))
     await state.set_state(Registration.passed)
 
@@ -187,19 +223,14 @@ async def action_selected(callback: CallbackQuery, state: FSMContext):
     await callback.answer()
     # action = callback.data
 
-    response = CLIENT.table('subjects').select('id, name').execute()
-    subjects = response.data
+    await REFERENCE.ensure_loaded()
+    keyboard = REFERENCE.subject_keyboard("subject_")
 
-    if not subjects:
+    if not keyboard:
         await callback.message.answer(_("В базе нет предметов."))
         return await state.clear()
 
-    builder = InlineKeyboardBuilder()
-    for subj in subjects:
-        builder.button(text=subj['name'], callback_data=f"subject_{subj['id']}")
-
-    builder.adjust(2)
-    await callback.message.answer(_("Выберите предмет:"), reply_markup=builder.as_markup())
+    await callback.message.answer(_("Выберите предмет:"), reply_markup=keyboard)
 
     await state.set_state(HomeWork.selecting_subject)
     await callback.answer()
@@ -213,8 +244,8 @@ async def subject_selected(callback: CallbackQuery, state: FSMContext):
     await state.update_data(subject_id=subject_id)
 
     try:
-        response = CLIENT.table('subjects').select('name').eq('id', subject_id).execute()
-        subject_name = response.data[0]['name'] if response.data else "неизвестный предмет"
+        await REFERENCE.ensure_loaded()
+        subject_name = REFERENCE.subject_name(subject_id) or "неизвестный предмет"
 
         await callback.message.answer(_("Выбран предмет: {subject_name}\n").format(subject_name=subject_name))
         await callback.message.answer(_("Введите задание:"))
@@ -250,10 +281,7 @@ async def deadline_entered(message: Message, state: FSMContext):
         # print(f'DATA_INSERT = subject_id: {int(data['subject_id'])},task: \
         # {str(data['task'])}, deadline: {deadline.isoformat()}, user_id: {str(message.from_user.id)}')
 
-        CLIENT.table('homework').insert({'subject_id': int(data['subject_id']), 'description': str(data['task']),
-                                         'due_date': deadline.isoformat(),
-                                         'is_completed': False,
-                                         'tg_id': str(message.from_user.id)}).execute()
+        await REPO.add_homework(int(data['subject_id']), str(data['task']), deadline.isoformat(), str(message.from_user.id))
 
         await message.answer(_("ДЗ успешно добавлено!"))
         # После добавления ДЗ возвращаемся в начальное состояние. Пользователь зареган и может давать команды
@@ -267,18 +295,13 @@ async def deadline_entered(message: Message, state: FSMContext):
 async def view_homeworks_start(callback: CallbackQuery, state: FSMContext):
     """Choose subject."""
     try:
-        response = CLIENT.table('subjects').select('id, name').execute()
-        subjects = response.data
+        await REFERENCE.ensure_loaded()
+        keyboard = REFERENCE.subject_keyboard("view_subject_")
 
-        if not subjects:
+        if not keyboard:
             await callback.message.answer(_("В базе нет предметов."))
             return await state.clear()
 
-        keyboard = InlineKeyboardMarkup(
-            inline_keyboard=[
-                [InlineKeyboardButton(text=subj['name'], callback_data=f"view_subject_{subj['id']}")]
-                for subj in subjects])
-
         await callback.message.answer(_("Выберите предмет для просмотра ДЗ:"), reply_markup=keyboard)
         await state.set_state(HomeWork.viewing_homeworks)
         await callback.answer()
@@ -288,27 +311,53 @@ async def view_homeworks_start(callback: CallbackQuery, state: FSMContext):
         await state.set_state(Registration.passed)
 
 
+async def homework_page(subject_id, archive=False, cursor=None, back=False):
+    """Make text and keyboard of one homework page.
+
+    Pages are fetched by (due_date, id) cursor: forward after it or back before it.
+    """
+    await REFERENCE.ensure_loaded()
+    subject_name = REFERENCE.subject_name(subject_id)
+    today = datetime.now(moscow_tz).date().isoformat()
+    homeworks, has_more = await REPO.homework_page(subject_id, today, archive, config.homework_page_size, cursor, back)
+
+    if not homeworks:
+        if archive:
+            text = _("В архиве по предмету {subject_name} нет домашних заданий.").format(subject_name=subject_name)
+        else:
+            text = _("По предмету {subject_name} нет домашних заданий.").format(subject_name=subject_name)
+    else:
+        hw_list = "\n\n".join(
+            _("Описание задания: {hw_des}\n").format(hw_des=hw['description']) +
+            _("Дедлайн: {deadtime}").format(deadtime=datetime.fromisoformat(hw['due_date']).strftime('%d.%m.%Y'))
+            for hw in homeworks)
+        text = _("Домашние задания по предмету {subject_name}:\n\n{hw_list}").format(
+            subject_name=subject_name, hw_list=hw_list)
+
+    has_prev, has_next = (has_more, cursor is not None) if back else (cursor is not None, has_more)
+    keyboard = InlineKeyboardBuilder()
+    if homeworks and has_prev:
+        first = homeworks[0]
+        keyboard.button(text="◀", callback_data=HomeworkPage(
+            subject_id=subject_id, due=first['due_date'], id=first['id'], back=True, archive=archive))
+    if homeworks and has_next:
+        last = homeworks[-1]
+        keyboard.button(text="▶", callback_data=HomeworkPage(
+            subject_id=subject_id, due=last['due_date'], id=last['id'], archive=archive))
+    keyboard.button(text=_("Актуальные") if archive else _("Архив"),
+                    callback_data=HomeworkPage(subject_id=subject_id, archive=not archive))
+    keyboard.adjust(2)
+    return text, keyboard.as_markup()
+
+
 @router.callback_query(HomeWork.viewing_homeworks, F.data.startswith("view_subject_"))
 async def show_homeworks(callback: CallbackQuery, state: FSMContext):
     """Get hw for particular subject."""
-    subject_id = callback.data.split("_")[-1]
+    subject_id = int(callback.data.split("_")[-1])
 
     try:
-        subject_name = CLIENT.table('subjects').select('name').eq('id', subject_id).execute().data[0]['name']
-
-        homeworks = CLIENT.table('homework').select('description, due_date').eq(
-            'subject_id', subject_id).order('due_date').execute().data
-
-        if not homeworks:
-            await callback.message.answer(_("По предмету {subject_name} нет домашних заданий.").format(subject_name=subject_name))
-        else:
-            hw_list = ""
-            for hw in homeworks:
-                hw_list = hw_list + _("Описание задания: {hw_des}\n").format(hw_des=hw['description']) + \
-                    _("Дедлайн: {deadtime}").format(
-                        deadtime=datetime.fromisoformat(hw['due_date']).strftime('%d.%m.%Y')) + "\n\n"
-
-            await callback.message.answer(_("Домашние задания по предмету {subject_name}:\n\n{hw_list}").format(subject_name=subject_name, hw_list=hw_list))
+        text, keyboard = await homework_page(subject_id)
+        await callback.message.answer(text, reply_markup=keyboard)
 
         await state.set_state(Registration.passed)
         await callback.answer()
@@ -317,6 +366,15 @@ async def show_homeworks(callback: CallbackQuery, state: FSMContext):
         await state.set_state(Registration.passed)
 
 
+@router.callback_query(HomeworkPage.filter())
+async def turn_homework_page(callback: CallbackQuery, callback_data: HomeworkPage):
+    """Show next or previous homework page, or switch archive."""
+    cursor = (callback_data.due, callback_data.id) if callback_data.due else None
+    text, keyboard = await homework_page(callback_data.subject_id, callback_data.archive, cursor, callback_data.back)
+    await callback.message.edit_text(text, reply_markup=keyboard)
+    await callback.answer()
+
+
 @router.message(F.text, Command("schedule"))
 async def set_day(message: Message, state: FSMContext):
     """Select day to get schedule."""
@@ -346,77 +404,228 @@ async def set_day(message: Message, state: FSMContext):
                          reply_markup=day.as_markup())
 
 
-def get_schedule(day, day_to_print):
-    """Get all information to print schedule."""
-    schedule = CLIENT.table("schedule").select("*").eq("day_of_week", day).execute().data
-    if not schedule:
+def format_schedule(pairs, day_to_print):
+    """Make schedule message from the pairs of the day."""
+    if not pairs:
         return _('В этот день нет пар.')
-    mes = '<b>Расписание на {}</b>'.format(day_to_print)
-    schedule = sorted(schedule, key=lambda x: x['pair_number'])
-    for i in schedule:
-        classroom = CLIENT.table('classrooms').select('number').eq("id", i["classroom_id"]).execute().data
-        time = CLIENT.table('time_slots').select('*').eq("pair_number", i["pair_number"]).execute().data
-        if i["teacher_id"]:
-            teacher = CLIENT.table('teachers').select('*').eq("id", i["teacher_id"]).execute().data
-        else:
-            teacher = ''
+    mes = _('<b>Расписание на {day}</b>').format(day=day_to_print)
+    for i in pairs:
         match i['week_type']:
             case 'even':
-                week_type = ' чётные недели'
+                week_type = _(' чётные недели')
             case 'odd':
-                week_type = ' нечётные недели'
+                week_type = _(' нечётные недели')
             case _:
                 week_type = ''
-        mes += f"\n\n<b>{time[0]['start_time'][:-3]} - {time[0]['end_time'][:-3]}</b>" + week_type
-        mes += "\nПредмет: <b>{}</b>".format(i['subject'])
-        mes += "\nКабинет: <b>{}</b>".format(classroom[0]['number'])
-        if teacher:
-            mes += "\nПреподаватель: {}".format(teacher[0]['name'])
+        mes += f"\n\n<b>{i['start_time'][:-3]} - {i['end_time'][:-3]}</b>" + week_type
+        mes += _("\nПредмет: <b>{subject}</b>").format(subject=i['subject'])
+        mes += _("\nКабинет: <b>{classroom}</b>").format(classroom=i['classroom'])
+        if i['teacher']:
+            mes += _("\nПреподаватель: {teacher}").format(teacher=i['teacher'])
     return mes
 
 
-@router.callback_query(F.data == 'monday')
+async def get_schedule(day, day_to_print, locale='ru_RU'):
+    """Get all information to print schedule."""
+    key = (day, locale)
+    mes = SCHEDULE_CACHE.get(key)
+    if mes is None:
+        mes = format_schedule(await REPO.day_schedule(day), day_to_print)
+        SCHEDULE_CACHE.put(key, mes)
+    return mes
+
+
+async def week_days(parity, locale):
+    """Get (number of pairs, message) for every day of an odd or even week.
+
+    The whole week is read in one query and only pairs of that week are shown.
+    """
+    key = ("week", parity, locale)
+    days = SCHEDULE_CACHE.get(key)
+    if days is None:
+        rows = await REPO.week_schedule()
+        names = day_names()
+        days = {}
+        for day in names:
+            # пары без чётности (NULL, '', 'all' и т.п.) идут каждую неделю, как в format_schedule
+            pairs = [row for row in rows if row["day_of_week"] == day
+                     and (row["week_type"] not in ("odd", "even") or row["week_type"] == parity)]
+            days[day] = (len(pairs), format_schedule(pairs, names[day]))
+        SCHEDULE_CACHE.put(key, days)
+    return days
+
+
+def week_title(day):
+    """Make title with number and parity of the week of the day."""
+    parity = week_parity(day, config.semester_start)
+    return _("Неделя {number}, {parity}").format(
+        number=week_number(day, config.semester_start), parity=_("нечётная") if parity == "odd" else _("чётная"))
+
+
+async def day_view(message, shift):
+    """Answer with the schedule of the day shift days from today."""
+    day = datetime.now(moscow_tz).date() + timedelta(days=shift)
+    days = await week_days(week_parity(day, config.semester_start), current_locale())
+    await message.answer(f"<i>{week_title(day)}</i>\n\n{days[day.isoweekday()][1]}", parse_mode="HTML")
+
+
+@router.message(Command("today"))
+async def today(message: Message):
+    """Pairs that happen today."""
+    await day_view(message, 0)
+
+
+@router.message(Command("tomorrow"))
+async def tomorrow(message: Message):
+    """Pairs that happen tomorrow."""
+    await day_view(message, 1)
+
+
+@router.message(Command("week"))
+async def week(message: Message):
+    """Pairs of the current week, days without pairs are skipped."""
+    day = datetime.now(moscow_tz).date()
+    days = await week_days(week_parity(day, config.semester_start), current_locale())
+    texts = [text for count, text in days.values() if count]
+    await message.answer(f"<i>{week_title(day)}</i>\n\n" + ("\n\n".join(texts) or _("На этой неделе нет пар.")),
+                         parse_mode="HTML")
+
+
+@router.callback_query(F.data == 'monday', flags={"throttle": "schedule"})
 async def monday(callback: CallbackQuery, state: FSMContext):
     """Schedule for monday."""
-    schedule = get_schedule(1, 'понедельник')
+    await callback.answer()
+    schedule = await get_schedule(1, _('понедельник'), current_locale())
     await callback.message.answer(schedule, parse_mode="HTML")
 
 
-@router.callback_query(F.data == 'tuesday')
+@router.callback_query(F.data == 'tuesday', flags={"throttle": "schedule"})
 async def tuesday(callback: CallbackQuery, state: FSMContext):
     """Schedule for tuesday."""
-    schedule = get_schedule(2, 'вторник')
+    await callback.answer()
+    schedule = await get_schedule(2, _('вторник'), current_locale())
     await callback.message.answer(schedule, parse_mode="HTML")
 
 
-@router.callback_query(F.data == 'wednesday')
+@router.callback_query(F.data == 'wednesday', flags={"throttle": "schedule"})
 async def wednesday(callback: CallbackQuery, state: FSMContext):
     """Schedule for wednesday."""
-    schedule = get_schedule(3, 'среда')
+    await callback.answer()
+    schedule = await get_schedule(3, _('среда'), current_locale())
     await callback.message.answer(schedule, parse_mode="HTML")
 
 
-@router.callback_query(F.data == 'thursday')
+@router.callback_query(F.data == 'thursday', flags={"throttle": "schedule"})
 async def thursday(callback: CallbackQuery, state: FSMContext):
     """Schedule for thursday."""
-    schedule = get_schedule(4, 'четверг')
+    await callback.answer()
+    schedule = await get_schedule(4, _('четверг'), current_locale())
     await callback.message.answer(schedule, parse_mode="HTML")
 
 
-@router.callback_query(F.data == 'friday')
+@router.callback_query(F.data == 'friday', flags={"throttle": "schedule"})
 async def friday(callback: CallbackQuery, state: FSMContext):
     """Schedule for friday."""
-    schedule = get_schedule(5, 'пятница')
+    await callback.answer()
+    schedule = await get_schedule(5, _('пятница'), current_locale())
     await callback.message.answer(schedule)
 
 
+@router.inline_query()
+async def inline_schedule(inline_query: InlineQuery):
+    """Answer @bot пн, @bot завтра and so on from the prebuilt index."""
+    await INLINE_INDEX.ensure_built()
+    weekday = datetime.now(moscow_tz).isoweekday()
+    await inline_query.answer(INLINE_INDEX.lookup(inline_query.query, current_locale(), weekday),
+                              cache_time=config.inline_cache_time, is_personal=True)
+
+
+@router.message(Command("export"))
+async def export_calendar(message: Message):
+    """Send schedule and deadlines of the user as .ics file."""
+    now = datetime.now(pytz.UTC)
+    deadlines, _built = await asyncio.gather(
+        REPO.deadlines_between([message.from_user.id], now.isoformat(), (now + timedelta(days=366)).isoformat()),
+        CALENDAR.ensure_built(config.semester_start, config.semester_weeks))
+    document = CALENDAR.file(deadlines, _("Расписание"), _("Дедлайн: {title}"))
+    await message.answer_document(document, caption=_("Откройте файл, чтобы добавить расписание и дедлайны в календарь."))
+
+
+def from_admin(event):
+    """Check that the update came from an administrator."""
+    return event.from_user.id in config.admin_ids
+
+
+@router.message(Command("reset_cache"), from_admin)
+async def reset_cache(message: Message):
+    """Drop rendered schedule after it was changed in the database."""
+    schedule_changed()
+    await message.answer(_("Кэш расписания очищен."))
+
+
+@router.message(Command("cache_stats"), from_admin)
+async def cache_stats(message: Message):
+    """Show schedule cache counters."""
+    await message.answer(_("Кэш расписания: попаданий {hits}, промахов {misses}, записей {size}").format(
+        **SCHEDULE_CACHE.stats()))
+
+
+def broadcast_report(counters):
+    """Make message with broadcast results."""
+    return _("Рассылка завершена: доставлено {sent}, ошибок {failed}, {rate:.1f} сообщений/с").format(**counters)
+
+
+async def run_broadcast(bot, broadcast):
+    """Send broadcast and report results to its author, return False if another process sends it."""
+    try:
+        counters = await BROADCASTS.run(broadcast, bot.send_message)
+        if counters is None:
+            return False
+        await bot.send_message(broadcast["created_by"], broadcast_report(counters))
+    except Exception as e:
+        print(f"Ошибка рассылки: {e}")
+        await bot.send_message(broadcast["created_by"], _("Рассылка прервана, она продолжится после перезапуска."))
+    return True
+
+
+@router.message(Command("broadcast"), from_admin)
+async def broadcast(message: Message, command: CommandObject):
+    """Send message to all registered users."""
+    if not command.args:
+        await message.answer(_("Напишите текст после команды: /broadcast текст"))
+        return
+    item, count = await BROADCASTS.create(command.args, message.from_user.id)
+    await message.answer(_("Рассылка поставлена в очередь, получателей: {count}").format(count=count))
+    background(run_broadcast(message.bot, item))
+
+
+@router.message(Command("digest"))
+async def toggle_digest(message: Message):
+    """Subscribe to the daily digest or unsubscribe."""
+    profile = await get_profile(message.from_user.id, message.from_user.username)
+    if profile is None:
+        await message.answer(_("Сначала зарегистрируйтесь: /start"))
+        return
+    enabled = not profile.get("digest")
+    await REPO.set_digest(str(message.from_user.id), enabled)
+    PROFILES.put(message.from_user.id, {**profile, "digest": enabled})
+    if enabled:
+        await message.answer(_("Каждое утро в {time} я буду присылать расписание, ДЗ и дедлайны. "
+                               "Отключить: /digest").format(time=config.digest_time))
+    else:
+        await message.answer(_("Ежедневная сводка отключена."))
+
+
 @router.message(F.text, Command("help"))
 async def get_help(message: Message, state: FSMContext):
     """Print all commands with instruction."""
     await message.answer(
         _("/schedule - просмотр расписания,\n") +
+        _("/today, /tomorrow, /week - пары на сегодня, завтра и неделю\n") +
         _("/deadlines - добавить/просмотреть дедлайны\n") +
-        _("/hw - домашнее задание")
+        _("/hw - домашнее задание\n") +
+        _("/digest - ежедневная сводка\n") +
+        _("/export - расписание и дедлайны для календаря")
     )
 
 
@@ -448,7 +657,7 @@ async def input_date(message: Message, state: FSMContext):
     """Input deadline date."""
     try:
         date = datetime.strptime(message.text, "%Y-%m-%d").date()
-        await state.update_data(date=date)
+        await state.update_data(date=date.isoformat())  # в хранилище состояний только JSON-совместимые значения
         await message.answer(_("Теперь введите время дедлайна в формате HH:MM"))
         await state.set_state(AddDeadline.waiting_for_time)
     except ValueError:
@@ -460,7 +669,7 @@ async def input_time(message: Message, state: FSMContext):
     """Input deadline time."""
     try:
         time = datetime.strptime(message.text, "%H:%M").time()
-        await state.update_data(time=time)
+        await state.update_data(time=time.strftime("%H:%M"))
         await message.answer(_("Теперь введите название дедлайна"))
         await state.set_state(AddDeadline.waiting_for_title)
     except ValueError:
@@ -473,43 +682,55 @@ async def input_title(message: Message, state: FSMContext):
     user_data = await state.get_data()
     title = message.text
 
-    naive_dt = datetime.combine(user_data["date"], user_data["time"])
+    naive_dt = datetime.strptime(f"{user_data['date']} {user_data['time']}", "%Y-%m-%d %H:%M")
     moscow_dt = moscow_tz.localize(naive_dt)
 
-    CLIENT.table("deadlines").insert({
-        "telegram_id": message.from_user.id,
-        "title": title,
-        "deadline_at": moscow_dt.isoformat(),
-        "notified": False
-    }).execute()
+    for deadline in await REPO.add_deadline(message.from_user.id, title, moscow_dt.isoformat()):
+        entries = reminder_entries(deadline, config.reminder_offsets, datetime.now(pytz.UTC))
+        if entries:
+            for entry in await REPO.add_reminders(entries):
+                REMINDERS.add({**entry, "telegram_id": deadline["telegram_id"], "title": deadline["title"],
+                               "deadline_at": deadline["deadline_at"]})
 
     await message.answer(_("Дедлайн «{title}» добавлен на {deadtime} (МСК)").format(title=title, deadtime=moscow_dt.strftime('%d.%m.%Y %H:%M')))
     await state.clear()
 
 
-@router.callback_query(F.data == "check_list")
-async def check_deadlines_list(callback: CallbackQuery, state: FSMContext):
-    """Check all deadlines."""
-    user_id = callback.from_user.id
+async def deadlines_page(user_id, page=0):
+    """Make text and keyboard of one page of user deadlines."""
     now = datetime.now(pytz.UTC)
-    future_deadlines = CLIENT.table("deadlines").select(
-        "*").eq("telegram_id", user_id).gt("deadline_at", now.isoformat()).execute()
-    if not future_deadlines:
-        await callback.message.answer(_("У вас пока нет активных дедлайнов!"))
-        return
-
-    sorted_deadlines = sorted(
-        future_deadlines.data,
-        key=lambda x: datetime.fromisoformat(x['deadline_at'])
-    )
-
-    text = _("<b>Ваши дедлайны:</b>\n\n")
-    for i, deadline in enumerate(sorted_deadlines, 1):
-        print(deadline)
-        deadline_time = datetime.fromisoformat(deadline["deadline_at"]).strftime('%d.%m.%Y %H:%M')
-        text += (
+    size = config.deadlines_page_size
+    deadlines, has_more = await REPO.user_deadlines(user_id, now.isoformat(), page * size, size)
+    if not deadlines:
+        return _("У вас пока нет активных дедлайнов!"), None
+
+    lines = [_("<b>Ваши дедлайны:</b>\n\n")]
+    for i, deadline in enumerate(deadlines, page * size + 1):
+        deadline_time = parse_time(deadline["deadline_at"]).astimezone(moscow_tz).strftime('%d.%m.%Y %H:%M')
+        lines.append(
             f"{i}. <b>{deadline['title']}</b>\n"
             f"   └ {deadline_time}\n\n"
         )
 
-    await callback.message.answer(text, parse_mode="HTML")
+    keyboard = InlineKeyboardBuilder()
+    if page > 0:
+        keyboard.button(text="◀", callback_data=DeadlinesPage(page=page - 1))
+    if has_more:
+        keyboard.button(text="▶", callback_data=DeadlinesPage(page=page + 1))
+    return "".join(lines), keyboard.as_markup()
+
+
+@router.callback_query(F.data == "check_list")
+async def check_deadlines_list(callback: CallbackQuery, state: FSMContext):
+    """Check all deadlines."""
+    text, keyboard = await deadlines_page(callback.from_user.id)
+    await callback.message.answer(text, parse_mode="HTML", reply_markup=keyboard)
+    await callback.answer()
+
+
+@router.callback_query(DeadlinesPage.filter())
+async def turn_deadlines_page(callback: CallbackQuery, callback_data: DeadlinesPage):
+    """Show another page of deadlines."""
+    text, keyboard = await deadlines_page(callback.from_user.id, callback_data.page)
+    await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+    await callback.answer()
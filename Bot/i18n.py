@@ -0,0 +1,93 @@
+"""Translations for users."""
+import asyncio
+import gettext as _gettext
+import os
+from contextvars import ContextVar
+from aiogram import BaseMiddleware
+from aiogram.fsm.storage.base import StorageKey
+
+
+DEFAULT_LOCALE = "ru_RU"
+LOCALES_PATH = os.path.join(os.path.dirname(__file__), 'locales')
+
+
+def load_catalogs(path=LOCALES_PATH):
+    """Load all catalogs from locales directory once."""
+    catalogs = {DEFAULT_LOCALE: _gettext.NullTranslations()}  # строки в коде уже на русском
+    for name in os.listdir(path):
+        if os.path.isdir(os.path.join(path, name)):
+            catalogs[name] = _gettext.translation("TG_bot", localedir=path, languages=[name], fallback=True)
+    return catalogs
+
+
+CATALOGS = load_catalogs()
+
+_locale = ContextVar("locale", default=DEFAULT_LOCALE)
+
+
+def current_locale():
+    """Get locale of the update being processed."""
+    return _locale.get()
+
+
+def use_locale(locale):
+    """Use locale until the end of the current update."""
+    return _locale.set(locale if locale in CATALOGS else DEFAULT_LOCALE)
+
+
+def gettext(message):
+    """Translate message to the locale of the current update."""
+    return CATALOGS[_locale.get()].gettext(message)
+
+
+def ngettext(singular, plural, n):
+    """Translate message with plural forms to the locale of the current update."""
+    return CATALOGS[_locale.get()].ngettext(singular, plural, n)
+
+
+class LocaleStore:
+    """Locales of users kept in FSM storage, shared by all bot processes.
+
+    A locale is stored with its own destiny, so clearing the dialog state
+    does not reset the language.
+    """
+
+    def __init__(self, storage):
+        """Keep locales in storage."""
+        self.storage = storage
+
+    @staticmethod
+    def _key(user_id):
+        return StorageKey(bot_id=0, chat_id=user_id, user_id=user_id, destiny="locale")
+
+    async def get(self, user_id):
+        """Get locale of the user, default if it was not chosen."""
+        data = await self.storage.get_data(self._key(user_id))
+        return data.get("locale", DEFAULT_LOCALE)
+
+    async def set(self, user_id, locale):
+        """Save locale chosen by the user."""
+        await self.storage.set_data(self._key(user_id), {"locale": locale})
+
+    async def many(self, user_ids):
+        """Get locales of several users as user id -> locale."""
+        user_ids = list(user_ids)
+        return dict(zip(user_ids, await asyncio.gather(*(self.get(user_id) for user_id in user_ids))))
+
+
+class LocaleMiddleware(BaseMiddleware):
+    """Choose translation for every update by the stored locale of its user."""
+
+    def __init__(self, locales=None):
+        """Read locales from LocaleStore, by default from the FSM storage of the dispatcher."""
+        self.locales = locales
+
+    async def __call__(self, handler, event, data):
+        """Process update with the locale of its user."""
+        user = data.get("event_from_user")
+        locales = self.locales or LocaleStore(data["fsm_storage"])
+        token = use_locale(await locales.get(user.id) if user else DEFAULT_LOCALE)
+        try:
+            return await handler(event, data)
+        finally:
+            _locale.reset(token)
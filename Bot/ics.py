@@ -0,0 +1,163 @@
+"""Schedule and deadlines in iCalendar format."""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from aiogram.types import InputFile
+
+from Bot.reminders import parse_time
+from Bot.semester import first_monday
+
+
+HEADER = [
+    "BEGIN:VCALENDAR",
+    "VERSION:2.0",
+    "PRODID:-//Scheduler bot//RU",
+    "CALSCALE:GREGORIAN",
+    "X-WR-TIMEZONE:Europe/Moscow",
+    "BEGIN:VTIMEZONE",
+    "TZID:Europe/Moscow",
+    "BEGIN:STANDARD",
+    "DTSTART:19700101T000000",
+    "TZOFFSETFROM:+0300",
+    "TZOFFSETTO:+0300",
+    "TZNAME:MSK",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+]
+FOOTER = ["END:VCALENDAR"]
+
+
+def escape(text):
+    """Escape text value."""
+    return str(text).replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def fold(line):
+    """Encode content line, folding it to lines of at most 75 octets."""
+    data = line.encode("utf-8")
+    parts = []
+    limit = 75
+    while len(data) > limit:
+        cut = limit
+        while data[cut] & 0xC0 == 0x80:  # не разрезаем символ UTF-8
+            cut -= 1
+        parts.append(data[:cut])
+        data = data[cut:]
+        limit = 74  # строка продолжения начинается с пробела
+    parts.append(data)
+    return b"\r\n ".join(parts) + b"\r\n"
+
+
+def _stamp():
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def pair_event(pair, semester_start, weeks, stamp):
+    """Make recurring event of a pair, even and odd week pairs repeat every other week."""
+    first = first_monday(semester_start) + timedelta(days=pair["day_of_week"] - 1)
+    interval = 2 if pair["week_type"] in ("odd", "even") else 1
+    if pair["week_type"] == "even":
+        first += timedelta(days=7)
+    while first < semester_start:
+        first += timedelta(days=7 * interval)
+    until = first_monday(semester_start) + timedelta(days=7 * weeks - 1)
+    start, end = pair["start_time"].replace(":", ""), pair["end_time"].replace(":", "")
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:pair-{pair['id']}@scheduler-bot",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART;TZID=Europe/Moscow:{first:%Y%m%d}T{start}",
+        f"DTEND;TZID=Europe/Moscow:{first:%Y%m%d}T{end}",
+        f"RRULE:FREQ=WEEKLY;INTERVAL={interval};UNTIL={until:%Y%m%d}T235959Z",
+        f"SUMMARY:{escape(pair['subject'])}",
+    ]
+    if pair.get("classroom"):
+        lines.append(f"LOCATION:{escape(pair['classroom'])}")
+    if pair.get("teacher"):
+        lines.append(f"DESCRIPTION:{escape(pair['teacher'])}")
+    lines.append("END:VEVENT")
+    return b"".join(fold(line) for line in lines)
+
+
+def deadline_event(deadline, stamp, summary):
+    """Make event of a deadline with a reminder an hour before."""
+    at = parse_time(deadline["deadline_at"]).strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VEVENT",
+        f"UID:deadline-{deadline['id']}@scheduler-bot",
+        f"DTSTAMP:{stamp}",
+        f"DTSTART:{at}",
+        f"DTEND:{at}",
+        f"SUMMARY:{escape(summary)}",
+        "BEGIN:VALARM",
+        "TRIGGER:-PT1H",
+        "ACTION:DISPLAY",
+        f"DESCRIPTION:{escape(summary)}",
+        "END:VALARM",
+        "END:VEVENT",
+    ]
+    return b"".join(fold(line) for line in lines)
+
+
+class CalendarFile(InputFile):
+    """Document uploaded chunk by chunk from a generator of encoded events."""
+
+    def __init__(self, parts, filename="schedule.ics"):
+        """Upload bytes from parts() generator."""
+        super().__init__(filename=filename)
+        self.parts = parts
+
+    async def read(self, bot):
+        """Yield chunks of about chunk_size bytes."""
+        buffer = []
+        size = 0
+        for part in self.parts():
+            buffer.append(part)
+            size += len(part)
+            if size >= self.chunk_size:
+                yield b"".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield b"".join(buffer)
+
+
+class ScheduleCalendar:
+    """Calendar events of the schedule, shared by all exports.
+
+    Events are rendered once and kept until the schedule changes, an export
+    only adds events of the user's deadlines.
+    """
+
+    def __init__(self, repo):
+        """Read schedule with repo."""
+        self.repo = repo
+        self.events = []  # закодированные VEVENT пар
+        self.key = None  # (начало семестра, число недель), для которых построены события
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Rebuild events on the next export, schedule has changed."""
+        self.key = None
+
+    async def ensure_built(self, semester_start, weeks):
+        """Build events for the semester if they are missing or outdated."""
+        if self.key != (semester_start, weeks):
+            async with self._lock:
+                if self.key != (semester_start, weeks):
+                    pairs = await self.repo.week_schedule()
+                    stamp = _stamp()
+                    self.events = [pair_event(pair, semester_start, weeks, stamp) for pair in pairs]
+                    self.key = (semester_start, weeks)
+
+    def file(self, deadlines, name, deadline_summary="{title}"):
+        """Make document with the schedule and deadlines."""
+        events = self.events
+        stamp = _stamp()
+
+        def parts():
+            yield b"".join(fold(line) for line in HEADER + [f"X-WR-CALNAME:{escape(name)}"])
+            yield from events
+            for deadline in deadlines:
+                yield deadline_event(deadline, stamp, deadline_summary.format(title=deadline["title"]))
+            yield b"".join(fold(line) for line in FOOTER)
+
+        return CalendarFile(parts)
@@ -0,0 +1,88 @@
+"""Schedule in inline mode."""
+import asyncio
+import contextvars
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent
+
+from Bot.i18n import CATALOGS, DEFAULT_LOCALE, gettext as _, use_locale
+
+
+DAYS = {
+    1: ("пн", "понедельник", "mon", "monday"),
+    2: ("вт", "вторник", "tue", "tuesday"),
+    3: ("ср", "среда", "wed", "wednesday"),
+    4: ("чт", "четверг", "thu", "thursday"),
+    5: ("пт", "пятница", "fri", "friday"),
+    6: ("сб", "суббота", "sat", "saturday"),
+    7: ("вс", "воскресенье", "sun", "sunday"),
+}
+RELATIVE = {"сегодня": 0, "today": 0, "завтра": 1, "tomorrow": 1, "послезавтра": 2}
+
+
+def day_names():
+    """Get names of week days in the current locale."""
+    return {1: _("понедельник"), 2: _("вторник"), 3: _("среда"), 4: _("четверг"),
+            5: _("пятница"), 6: _("суббота"), 7: _("воскресенье")}
+
+
+class ScheduleIndex:
+    """Inline answers with the schedule of every day rendered in every locale.
+
+    The whole week is read in one query and rendered once, so answering an
+    inline query is a few dictionary lookups without the database.
+    """
+
+    def __init__(self, repo, render):
+        """Read schedule with repo, render(pairs, day_name) makes the message."""
+        self.repo = repo
+        self.render = render
+        self.results = {}  # (локаль, день недели) -> готовый ответ
+        self.version = 0
+        self.built = False
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Rebuild on the next query, schedule has changed."""
+        self.built = False
+
+    async def ensure_built(self):
+        """Build index if it is missing or outdated."""
+        if not self.built:
+            async with self._lock:
+                if not self.built:
+                    await self.build()
+
+    async def build(self):
+        """Read week schedule and render answers for all days and locales."""
+        rows = await self.repo.week_schedule()
+        by_day = {day: [] for day in DAYS}
+        for row in rows:
+            by_day.setdefault(row["day_of_week"], []).append(row)
+        self.version += 1
+        # локаль переключается в копии контекста, текущее обновление её не замечает
+        self.results = contextvars.copy_context().run(self._render, by_day)
+        self.built = True
+
+    def _render(self, by_day):
+        results = {}
+        for locale in CATALOGS:
+            use_locale(locale)
+            names = day_names()
+            for day, pairs in by_day.items():
+                results[(locale, day)] = InlineQueryResultArticle(
+                    id=f"{self.version}-{locale}-{day}",
+                    title=names[day].capitalize(),
+                    description=_("Пар: {count}").format(count=len(pairs)),
+                    input_message_content=InputTextMessageContent(
+                        message_text=self.render(pairs, names[day]), parse_mode="HTML"))
+        return results
+
+    def lookup(self, query, locale, weekday):
+        """Get answers for the query typed on the given day of week (1 - monday)."""
+        text = query.strip().lower()
+        if not text:
+            days = [weekday, weekday % 7 + 1]
+        else:
+            days = [(weekday - 1 + shift) % 7 + 1 for word, shift in RELATIVE.items() if word.startswith(text)]
+            days += [day for day, words in DAYS.items() if any(word.startswith(text) for word in words)]
+        locale = locale if (locale, 1) in self.results else DEFAULT_LOCALE
+        return [self.results[(locale, day)] for day in dict.fromkeys(days)]
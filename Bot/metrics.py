@@ -0,0 +1,175 @@
+"""Metrics in Prometheus text format."""
+import time
+from contextvars import ContextVar
+from aiohttp import web
+from aiogram import BaseMiddleware
+
+
+REGISTRY = []
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+
+def _labels(names, values, extra=()):
+    """Format labels as {a="1",b="2"}."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Value that only grows, or is read from fn when rendered."""
+
+    kind = "counter"
+
+    def __init__(self, name, help, labels=(), fn=None):
+        """Register counter."""
+        self.name, self.help, self.labels, self.fn = name, help, labels, fn
+        self.values = {}
+        REGISTRY.append(self)
+
+    def inc(self, *labels, value=1):
+        """Add value."""
+        self.values[labels] = self.values.get(labels, 0) + value
+
+    def samples(self):
+        """Get lines with values."""
+        if self.fn:
+            self.values[()] = self.fn()
+        return [f"{self.name}{_labels(self.labels, key)} {value}" for key, value in self.values.items()]
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, *labels, value):
+        """Set value."""
+        self.values[labels] = value
+
+
+class Histogram:
+    """Distribution of observed values."""
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        """Register histogram."""
+        self.name, self.help, self.labels, self.buckets = name, help, labels, buckets
+        self.values = {}  # метки -> [счётчики по корзинам, сумма, количество]
+        REGISTRY.append(self)
+
+    def observe(self, value, *labels):
+        """Add observed value."""
+        counts, total, count = self.values.get(labels, ([0] * len(self.buckets), 0, 0))
+        counts = [c + (value <= bound) for c, bound in zip(counts, self.buckets)]
+        self.values[labels] = (counts, total + value, count + 1)
+
+    def samples(self):
+        """Get lines with values."""
+        lines = []
+        for key, (counts, total, count) in self.values.items():
+            for bound, bucket in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', bound)])} {bucket}")
+            lines.append(f"{self.name}_bucket{_labels(self.labels, key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {count}")
+        return lines
+
+
+def render():
+    """Get all metrics in Prometheus text format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+UPDATE_SECONDS = Histogram("bot_update_seconds", "Update processing time.", ("handler",))
+UPDATE_ERRORS = Counter("bot_update_errors_total", "Updates finished with exception.", ("handler",))
+UPDATE_DB_QUERIES = Histogram("bot_update_db_queries", "Database queries per update.", ("handler",), COUNT_BUCKETS)
+UPDATE_DB_SECONDS = Histogram("bot_update_db_seconds", "Time spent in database per update.", ("handler",))
+DB_QUERY_SECONDS = Histogram("bot_db_query_seconds", "Database query time.")
+DB_COLLAPSED = Counter("bot_db_collapsed_total", "Reads that joined an identical query in flight.", ("query",))
+REMINDER_TICK_SECONDS = Histogram("bot_reminder_tick_seconds", "Reminder worker tick time.")
+REMINDER_BACKLOG = Gauge("bot_reminder_backlog", "Reminders waiting in the scheduler heap.")
+REMINDERS_SENT = Counter("bot_reminders_sent_total", "Delivered reminder queue entries.")
+
+
+class UpdateStats:
+    """Database usage and handler of the update being processed."""
+
+    def __init__(self):
+        """Start with no queries."""
+        self.handler = "unhandled"
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+_update = ContextVar("update_stats", default=None)
+
+
+def record_query(seconds):
+    """Count database query, also for the current update if there is one."""
+    DB_QUERY_SECONDS.observe(seconds)
+    stats = _update.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += seconds
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """Outer update middleware measuring latency, errors and database usage."""
+
+    async def __call__(self, handler, event, data):
+        """Process update and record its metrics."""
+        stats = UpdateStats()
+        token = _update.set(stats)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            UPDATE_ERRORS.inc(stats.handler)
+            raise
+        finally:
+            _update.reset(token)
+            UPDATE_SECONDS.observe(time.perf_counter() - start, stats.handler)
+            UPDATE_DB_QUERIES.observe(stats.queries, stats.handler)
+            UPDATE_DB_SECONDS.observe(stats.db_seconds, stats.handler)
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Inner middleware telling MetricsMiddleware which handler got the update."""
+
+    async def __call__(self, handler, event, data):
+        """Save handler name and call it."""
+        stats = _update.get()
+        if stats is not None:
+            stats.handler = data["handler"].callback.__name__
+        return await handler(event, data)
+
+
+def setup_metrics(dp):
+    """Register metrics middlewares in the dispatcher."""
+    dp.update.outer_middleware(MetricsMiddleware())
+    for observer in (dp.message, dp.callback_query, dp.inline_query):
+        observer.middleware(HandlerNameMiddleware())
+
+
+async def start_metrics_server(host, port):
+    """Serve /metrics, return runner to clean up."""
+    async def metrics(request):
+        return web.Response(text=render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
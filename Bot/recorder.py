@@ -0,0 +1,29 @@
+"""Recording of incoming updates for replay."""
+import json
+import time
+from aiogram import BaseMiddleware
+
+
+class UpdateRecorder(BaseMiddleware):
+    """Outer update middleware appending every update to a JSONL file.
+
+    Each line is {"t": unix time, "update": update as sent by Telegram},
+    tests/load_replay.py replays such files.
+    """
+
+    def __init__(self, path):
+        """Append to file at path."""
+        self.file = open(path, "a", encoding="utf-8", buffering=1)
+
+    async def __call__(self, handler, event, data):
+        """Save update and process it."""
+        try:
+            record = {"t": time.time(), "update": event.model_dump(mode="json", exclude_none=True)}
+            self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"Ошибка записи апдейта: {e}")
+        return await handler(event, data)
+
+    def close(self):
+        """Close file."""
+        self.file.close()
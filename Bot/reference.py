@@ -0,0 +1,97 @@
+"""In-memory copy of small reference tables."""
+import asyncio
+from aiogram.types import InlineKeyboardMarkup
+from aiogram.types.inline_keyboard_button import InlineKeyboardButton
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+
+class ReferenceData:
+    """Subjects, classrooms, teachers and time slots kept in memory.
+
+    Tables are loaded once and then refreshed in background. Only tables
+    that actually changed are replaced, keyboards are rebuilt only when
+    subjects change. The schedule itself is read too, only to notice that
+    a pair was moved and rendered schedules are outdated.
+    """
+
+    def __init__(self, repo, on_change=None):
+        """Use repo to read tables, call on_change when something changed."""
+        self.repo = repo
+        self.on_change = on_change
+        self.subjects = {}  # id -> название
+        self.classrooms = {}  # id -> номер
+        self.teachers = {}  # id -> ФИО
+        self.time_slots = {}  # номер пары -> строка из time_slots
+        self.schedule = []  # строки schedule_full, только для сравнения
+        self.keyboards = {}  # префикс callback_data -> клавиатура выбора предмета
+        self.loaded = False
+        self._lock = asyncio.Lock()
+
+    def subject_name(self, subject_id):
+        """Get subject name or None."""
+        return self.subjects.get(int(subject_id))
+
+    def subject_keyboard(self, prefix):
+        """Get keyboard with subjects for given callback prefix."""
+        return self.keyboards.get(prefix)
+
+    async def ensure_loaded(self):
+        """Load tables if it was not done yet."""
+        if not self.loaded:
+            async with self._lock:
+                if not self.loaded:
+                    await self.refresh()
+
+    async def refresh(self):
+        """Reload tables and apply changes."""
+        subjects, classrooms, teachers, time_slots, schedule = await asyncio.gather(
+            self.repo.subjects(), self.repo.classrooms(), self.repo.teachers(), self.repo.time_slots(),
+            self.repo.week_schedule())
+
+        subjects = {row["id"]: row["name"] for row in subjects}
+        classrooms = {row["id"]: row["number"] for row in classrooms}
+        teachers = {row["id"]: row["name"] for row in teachers}
+        time_slots = {row["pair_number"]: row for row in time_slots}
+
+        changed = False
+        if subjects != self.subjects or not self.loaded:
+            self.subjects = subjects
+            self._build_keyboards()
+            changed = True
+        for name, table in (("classrooms", classrooms), ("teachers", teachers), ("time_slots", time_slots),
+                            ("schedule", schedule)):
+            if table != getattr(self, name):
+                setattr(self, name, table)
+                changed = True
+
+        if changed and self.loaded and self.on_change:
+            self.on_change()
+        self.loaded = True
+        return changed
+
+    async def refresh_forever(self, interval):
+        """Refresh tables every interval seconds."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Ошибка обновления справочников: {e}")
+
+    def _build_keyboards(self):
+        """Prebuild subject keyboards."""
+        if not self.subjects:
+            self.keyboards = {}
+            return
+
+        builder = InlineKeyboardBuilder()
+        for subject_id, name in self.subjects.items():
+            builder.button(text=name, callback_data=f"subject_{subject_id}")
+        builder.adjust(2)
+
+        self.keyboards = {
+            "subject_": builder.as_markup(),
+            "view_subject_": InlineKeyboardMarkup(inline_keyboard=[
+                [InlineKeyboardButton(text=name, callback_data=f"view_subject_{subject_id}")]
+                for subject_id, name in self.subjects.items()]),
+        }
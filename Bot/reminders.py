@@ -0,0 +1,175 @@
+"""Deadline reminders scheduler."""
+import asyncio
+import heapq
+import os
+import socket
+import time
+import pytz
+from datetime import datetime, timedelta
+
+from Bot import metrics
+
+
+def parse_time(value):
+    """Parse timestamp from the database as aware UTC datetime."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=pytz.UTC)
+    return moment.astimezone(pytz.UTC)
+
+
+def reminder_entries(deadline, offsets, now):
+    """Make reminder queue entries for the deadline, one per offset in minutes.
+
+    Offsets whose time has already passed are skipped.
+    """
+    deadline_at = parse_time(deadline["deadline_at"])
+    entries = []
+    for offset in sorted(set(offsets), reverse=True):
+        fire_at = deadline_at - timedelta(minutes=offset)
+        if fire_at > now:
+            entries.append({"deadline_id": deadline["id"], "fire_at": fire_at.isoformat()})
+    return entries
+
+
+def worker_name():
+    """Name this process host:pid in leases."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ReminderScheduler:
+    """Fire reminders exactly when they are due.
+
+    Reminders are read from the reminder queue, where every deadline has an
+    entry per reminder offset. Only entries inside a sliding horizon are kept
+    in a min-heap ordered by time. The loop sleeps until the nearest reminder,
+    the end of the horizon or a new entry added by ``add``, whichever comes first.
+
+    Several bot processes may run the scheduler at once. Due entries are
+    leased with a conditional update before sending, so each one is sent by
+    the worker that claimed it. An entry leased by another worker is tried
+    once more when its lease expires, in case that worker died.
+    """
+
+    def __init__(self, repo, horizon=timedelta(hours=1), concurrency=20, grace=timedelta(minutes=5),
+                 lease=timedelta(minutes=5), worker=None):
+        """Look horizon ahead, send at most concurrency messages at once.
+
+        Reminders late by more than grace (e.g. while the bot was down) are skipped.
+        Claimed entries are held for lease, worker names this process in the queue.
+        """
+        self.repo = repo
+        self.horizon = horizon
+        self.grace = grace
+        self.lease = lease
+        self.worker = worker or worker_name()
+        self._retried = set()  # записи, занятые другим воркером и отложенные до конца его аренды
+        self._heap = []  # (время напоминания, id записи в очереди, строка)
+        self._scheduled = set()
+        self._horizon_end = None
+        self._wakeup = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def add(self, row):
+        """Schedule queue entry if it falls inside the horizon."""
+        if row["id"] in self._scheduled:
+            return
+        fire_at = parse_time(row["fire_at"])
+        if self._horizon_end is not None and fire_at > self._horizon_end:
+            return  # попадёт в очередь при следующей загрузке
+        heapq.heappush(self._heap, (fire_at, row["id"], row))
+        self._scheduled.add(row["id"])
+        self._wakeup.set()
+
+    async def load(self, now):
+        """Load queue entries due within the horizon."""
+        self._horizon_end = now + self.horizon
+        rows = await self.repo.reminders_due((now - self.grace).isoformat(), self._horizon_end.isoformat())
+        for row in rows:
+            self.add(row)
+
+    def pop_due(self, now):
+        """Take reminders whose time has come."""
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, entry_id, row = heapq.heappop(self._heap)
+            self._scheduled.discard(entry_id)
+            due.append(row)
+        return due
+
+    async def claim(self, rows, now):
+        """Lease due entries for this worker, return the rows it got.
+
+        Entries held by another worker are rescheduled once to the end of its lease.
+        """
+        if not rows:
+            return []
+        try:
+            claimed = set(await self.repo.claim_reminders([row["id"] for row in rows], self.worker,
+                                                          now.isoformat(), (now + self.lease).isoformat()))
+        except Exception as e:
+            print(f"Ошибка захвата напоминаний: {e}")
+            claimed = set()
+        retry_at = now + self.lease + timedelta(seconds=1)
+        for row in rows:
+            if row["id"] in claimed or row["id"] in self._retried:
+                self._retried.discard(row["id"])
+            elif row["id"] not in self._scheduled:
+                self._retried.add(row["id"])
+                heapq.heappush(self._heap, (retry_at, row["id"], row))
+                self._scheduled.add(row["id"])
+        return [row for row in rows if row["id"] in claimed]
+
+    async def deliver(self, rows, send):
+        """Send reminders concurrently and mark delivered entries in one query.
+
+        Reminders for the same user are merged into one message.
+        """
+        by_chat = {}
+        for row in rows:
+            by_chat.setdefault(row["telegram_id"], []).append(row)
+
+        async def deliver_chat(telegram_id, chat_rows):
+            async with self._semaphore:
+                try:
+                    await send(telegram_id, chat_rows)
+                    return [row["id"] for row in chat_rows]
+                except Exception as e:
+                    print(f"Ошибка отправки уведомления: {e}")
+                    return []
+
+        results = await asyncio.gather(*(deliver_chat(chat, chat_rows) for chat, chat_rows in by_chat.items()))
+        delivered = [entry_id for ids in results for entry_id in ids]
+        if delivered:
+            try:
+                await self.repo.mark_reminders_sent(delivered)
+            except Exception as e:
+                print(f"Ошибка сохранения статуса уведомлений: {e}")
+        return delivered
+
+    async def run(self, send):
+        """Deliver reminders forever using send(telegram_id, rows) coroutine."""
+        while True:
+            self._wakeup.clear()
+            tick_start = time.perf_counter()
+            now = datetime.now(pytz.UTC)
+            if self._horizon_end is None or now >= self._horizon_end:
+                try:
+                    await self.load(now)
+                except Exception as e:
+                    print(f"Ошибка загрузки дедлайнов: {e}")
+                    self._horizon_end = now + timedelta(minutes=1)
+
+            delivered = await self.deliver(await self.claim(self.pop_due(now), now), send)
+            metrics.REMINDERS_SENT.inc(value=len(delivered))
+            metrics.REMINDER_BACKLOG.set(value=len(self._heap))
+            metrics.REMINDER_TICK_SECONDS.observe(time.perf_counter() - tick_start)
+
+            now = datetime.now(pytz.UTC)
+            wake_at = self._horizon_end
+            if self._heap:
+                wake_at = min(wake_at, self._heap[0][0])
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), max((wake_at - now).total_seconds(), 0))
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,247 @@
+"""Non-blocking access to the bot database."""
+import asyncio
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from Bot import metrics
+
+
+class Repository:
+    """Awaitable wrapper around the synchronous supabase client.
+
+    Every ``execute()`` runs in a bounded thread pool, so a slow query
+    never blocks the event loop and other updates keep being processed.
+    Identical reads issued at the same time share one query and its result,
+    so the result must not be modified by callers.
+    """
+
+    def __init__(self, client, max_workers=8):
+        """Wrap client, run at most max_workers queries at once."""
+        self.client = client
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db")
+        self._inflight = {}  # ключ чтения -> задача, результат которой ждут все
+
+    async def _execute(self, query):
+        """Run prepared query in the pool and return its data."""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            response = await loop.run_in_executor(self._executor, query.execute)
+        finally:
+            metrics.record_query(time.perf_counter() - start)
+        return response.data
+
+    async def _read(self, key, query):
+        """Run read query, concurrent calls with the same key wait for the first one."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._execute(query))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            metrics.DB_COLLAPSED.inc(key[0])
+        # отмена одного из ожидающих не должна отменять запрос остальных
+        return await asyncio.shield(task)
+
+    def close(self):
+        """Stop worker threads."""
+        self._executor.shutdown(wait=False)
+
+    # Пользователи
+
+    async def user(self, tg_id, tg_username):
+        """Get user by telegram id, or added in advance by username only."""
+        return await self._read(("user", tg_id, tg_username), self.client.table("users").select("tg_id, name, tg_username, digest").or_(
+            f"tg_id.eq.{tg_id},and(tg_id.is.null,tg_username.eq.{tg_username})"))
+
+    async def save_user(self, tg_id, name, tg_username):
+        """Insert user or update existing one with the same telegram id."""
+        row = {"tg_id": tg_id, "name": name, "tg_username": tg_username}
+        return await self._execute(self.client.table("users").upsert(row, on_conflict="tg_id"))
+
+    async def bind_tg_id(self, tg_username, tg_id):
+        """Save telegram id of the user with given username."""
+        return await self._execute(self.client.table("users").update({"tg_id": tg_id}).eq("tg_username", tg_username))
+
+    async def set_digest(self, tg_id, enabled):
+        """Subscribe user to the daily digest or unsubscribe."""
+        return await self._execute(self.client.table("users").update({"digest": enabled}).eq("tg_id", tg_id))
+
+    async def claim_digest(self, day):
+        """Mark the digest of the day as sent, False if another process already did."""
+        rows = await self._execute(self.client.table("digest_runs").update({"sent_on": day}).eq("id", 1).or_(
+            f"sent_on.is.null,sent_on.lt.{day}"))
+        return bool(rows)
+
+    async def digest_subscribers(self):
+        """Get telegram ids of users subscribed to the daily digest."""
+        rows = await self._execute(self.client.table("users").select("tg_id").eq("digest", True))
+        return [row["tg_id"] for row in rows if row["tg_id"]]
+
+    # Предметы и ДЗ
+
+    async def subjects(self):
+        """Get all subjects."""
+        return await self._read(("subjects",), self.client.table("subjects").select("id, name"))
+
+    async def add_homework(self, subject_id, description, due_date, tg_id):
+        """Insert new homework."""
+        row = {"subject_id": subject_id, "description": description,
+               "due_date": due_date, "is_completed": False, "tg_id": tg_id}
+        return await self._execute(self.client.table("homework").insert(row))
+
+    async def homework_page(self, subject_id, today, archive, limit, cursor=None, back=False):
+        """Get page of homeworks and whether there are more in that direction.
+
+        Upcoming homeworks are due today or later and go by (due_date, id),
+        archive ones are due earlier and go from the newest, by (due_date, id) descending.
+        cursor is (due_date, id) of the row to start after, or before if back is set.
+        """
+        query = self.client.table("homework").select("id, description, due_date").eq("subject_id", subject_id)
+        query = query.lt("due_date", today) if archive else query.gte("due_date", today)
+        desc = archive != back  # назад по архиву - это по возрастанию
+        if cursor:
+            due, row_id = cursor
+            op = "lt" if desc else "gt"
+            query = query.or_(f"due_date.{op}.{due},and(due_date.eq.{due},id.{op}.{row_id})")
+        rows = await self._execute(query.order("due_date", desc=desc).order("id", desc=desc).limit(limit + 1))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if back:
+            rows.reverse()
+        return rows, has_more
+
+    async def homework_due(self, first_day, last_day):
+        """Get not completed homework due between two dates inclusive."""
+        return await self._execute(self.client.table("homework").select("subject_id, description, due_date").gte(
+            "due_date", first_day).lte("due_date", last_day).eq("is_completed", False).order("due_date").order("id"))
+
+    # Расписание
+
+    async def classrooms(self):
+        """Get all classrooms."""
+        return await self._read(("classrooms",), self.client.table("classrooms").select("id, number"))
+
+    async def teachers(self):
+        """Get all teachers."""
+        return await self._read(("teachers",), self.client.table("teachers").select("id, name"))
+
+    async def time_slots(self):
+        """Get all time slots."""
+        return await self._read(("time_slots",), self.client.table("time_slots").select("pair_number, start_time, end_time"))
+
+    async def day_schedule(self, day):
+        """Get pairs of the day with time, classroom and teacher in one query."""
+        return await self._read(("day_schedule", day), self.client.table("schedule_full").select(
+            "pair_number, week_type, subject, start_time, end_time, classroom, teacher").eq(
+            "day_of_week", day).order("pair_number"))
+
+    async def week_schedule(self):
+        """Get pairs of all days in one query."""
+        return await self._read(("week_schedule",), self.client.table("schedule_full").select(
+            "id, day_of_week, pair_number, week_type, subject, start_time, end_time, classroom, teacher").order(
+            "day_of_week").order("pair_number"))
+
+    # Дедлайны
+
+    async def add_deadline(self, telegram_id, title, deadline_at):
+        """Insert new deadline."""
+        row = {"telegram_id": telegram_id, "title": title, "deadline_at": deadline_at, "notified": False}
+        return await self._execute(self.client.table("deadlines").insert(row))
+
+    async def user_deadlines(self, telegram_id, after, offset, limit):
+        """Get page of user deadlines later than after, nearest first, and whether there are more."""
+        rows = await self._execute(self.client.table("deadlines").select("title, deadline_at").eq(
+            "telegram_id", telegram_id).gt("deadline_at", after).order("deadline_at").range(offset, offset + limit))
+        return rows[:limit], len(rows) > limit
+
+    async def deadlines_between(self, telegram_ids, after, before):
+        """Get deadlines of several users from after to before inclusive, nearest first."""
+        return await self._execute(self.client.table("deadlines").select("id, telegram_id, title, deadline_at").in_(
+            "telegram_id", telegram_ids).gt("deadline_at", after).lte("deadline_at", before).order("deadline_at"))
+
+    # Очередь напоминаний
+
+    async def add_reminders(self, entries):
+        """Insert reminder queue entries."""
+        return await self._execute(self.client.table("reminder_queue").insert(entries))
+
+    async def reminders_due(self, after, before):
+        """Get not sent reminders with fire time between after and before, with their deadlines."""
+        rows = await self._execute(self.client.table("reminder_queue").select(
+            "id, fire_at, deadline_id, deadlines(telegram_id, title, deadline_at)").eq(
+            "sent", False).gt("fire_at", after).lte("fire_at", before).order("fire_at"))
+        return [{"id": row["id"], "fire_at": row["fire_at"], "deadline_id": row["deadline_id"], **row["deadlines"]}
+                for row in rows]
+
+    async def claim_reminders(self, entry_ids, worker, now, lease_until):
+        """Lease not sent entries that are free or whose lease expired, return ids of the leased ones.
+
+        The condition is checked by the update itself, so of several workers
+        claiming the same entry only one gets it.
+        """
+        rows = await self._execute(self.client.table("reminder_queue").update(
+            {"locked_by": worker, "locked_until": lease_until}).in_("id", entry_ids).eq("sent", False).or_(
+            f"locked_until.is.null,locked_until.lt.{now}"))
+        return [row["id"] for row in rows]
+
+    async def mark_reminders_sent(self, entry_ids):
+        """Mark reminder queue entries as sent."""
+        return await self._execute(self.client.table("reminder_queue").update({"sent": True}).in_("id", entry_ids))
+
+    # Рассылки
+
+    async def registered_tg_ids(self, page=1000):
+        """Get telegram ids of all registered users."""
+        tg_ids, start = [], 0
+        while True:
+            rows = await self._execute(self.client.table("users").select("tg_id").order("id").range(start, start + page - 1))
+            tg_ids.extend(row["tg_id"] for row in rows if row["tg_id"])
+            if len(rows) < page:
+                return tg_ids
+            start += page
+
+    async def create_broadcast(self, text, created_by):
+        """Insert broadcast."""
+        return await self._execute(self.client.table("broadcasts").insert({"text": text, "created_by": created_by}))
+
+    async def add_broadcast_recipients(self, broadcast_id, tg_ids, chunk=500):
+        """Insert pending recipients of the broadcast."""
+        for start in range(0, len(tg_ids), chunk):
+            rows = [{"broadcast_id": broadcast_id, "tg_id": tg_id, "status": "pending"} for tg_id in tg_ids[start:start + chunk]]
+            await self._execute(self.client.table("broadcast_recipients").insert(rows))
+
+    async def claim_broadcast(self, broadcast_id, worker, now, lease_until):
+        """Lease unfinished broadcast that is free, expired or already held by worker, return whether it was leased."""
+        rows = await self._execute(self.client.table("broadcasts").update(
+            {"locked_by": worker, "locked_until": lease_until}).eq("id", broadcast_id).is_("finished_at", "null").or_(
+            f"locked_until.is.null,locked_until.lt.{now},locked_by.eq.{worker}"))
+        return bool(rows)
+
+    async def pending_recipients(self, broadcast_id, limit):
+        """Get telegram ids of recipients who did not get the broadcast yet."""
+        rows = await self._execute(self.client.table("broadcast_recipients").select("tg_id").eq(
+            "broadcast_id", broadcast_id).eq("status", "pending").limit(limit))
+        return [row["tg_id"] for row in rows]
+
+    async def set_recipients_status(self, broadcast_id, tg_ids, status):
+        """Mark recipients as sent or failed."""
+        return await self._execute(self.client.table("broadcast_recipients").update({"status": status}).eq(
+            "broadcast_id", broadcast_id).in_("tg_id", tg_ids))
+
+    async def finish_broadcast(self, broadcast_id):
+        """Save that the broadcast is finished."""
+        return await self._execute(self.client.table("broadcasts").update(
+            {"finished_at": datetime.now(timezone.utc).isoformat()}).eq("id", broadcast_id))
+
+    async def unfinished_broadcasts(self):
+        """Get broadcasts interrupted by restart or being sent by other processes."""
+        return await self._execute(self.client.table("broadcasts").select("id, text, created_by").is_(
+            "finished_at", "null").order("id"))
+
+    async def broadcast_counts(self, broadcast_id):
+        """Count recipients of the broadcast by status."""
+        rows = await self._execute(self.client.table("broadcast_recipients").select("status").eq("broadcast_id", broadcast_id))
+        return Counter(row["status"] for row in rows)
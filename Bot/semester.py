@@ -0,0 +1,17 @@
+"""Weeks of the semester."""
+from datetime import timedelta
+
+
+def first_monday(semester_start):
+    """Get monday of the first week of the semester."""
+    return semester_start - timedelta(days=semester_start.weekday())
+
+
+def week_number(day, semester_start):
+    """Get number of the week of the semester, the first week is 1."""
+    return (day - first_monday(semester_start)).days // 7 + 1
+
+
+def week_parity(day, semester_start):
+    """Get week_type of the week with the day: 'odd' or 'even'."""
+    return "odd" if week_number(day, semester_start) % 2 else "even"
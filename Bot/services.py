@@ -0,0 +1,50 @@
+"""Backend client, repository and bot shared by handlers and workers.
+
+Everything is created on first use, so importing the bot modules neither
+reads .env nor opens connections.
+"""
+import functools
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.enums import ParseMode
+
+from Bot.config import Lazy, get_settings
+from Bot.i18n import LocaleStore
+from Bot.repository import Repository
+from Bot.storage import create_storage
+
+
+def create_client(url, key):
+    """Create supabase client."""
+    import supabase  # импорт supabase занимает заметное время, нужен только при первом запросе
+    return supabase.create_client(url, key)
+
+
+@functools.cache
+def get_client():
+    """Get the only supabase client."""
+    settings = get_settings()
+    return create_client(settings.url.get_secret_value(), settings.key.get_secret_value())
+
+
+@functools.cache
+def get_repo():
+    """Get repository over the shared client."""
+    return Repository(get_client(), max_workers=get_settings().db_workers)
+
+
+@functools.cache
+def get_bot():
+    """Get the only bot."""
+    return Bot(token=get_settings().bot_token.get_secret_value(), default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+
+@functools.cache
+def get_storage():
+    """Get FSM storage shared by the dispatcher and workers."""
+    settings = get_settings()
+    return create_storage(settings.fsm_storage, settings.fsm_storage_url)
+
+
+REPO = Lazy(get_repo)
+LOCALES = Lazy(lambda: LocaleStore(get_storage()))  # языки пользователей для рассылок вне обновлений
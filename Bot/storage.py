@@ -0,0 +1,91 @@
+"""FSM storages."""
+import asyncio
+import json
+import sqlite3
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import DEFAULT_DESTINY, BaseStorage, DefaultKeyBuilder, KeyBuilder
+from aiogram.fsm.storage.memory import MemoryStorage
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM storage in SQLite file.
+
+    Several bot processes on one host can share the file, so conversation
+    state survives restarts and is seen by every process.
+    """
+
+    def __init__(self, path):
+        """Use SQLite database at path."""
+        self.path = path
+        self.key_builder = DefaultKeyBuilder(with_destiny=True)
+        with self._connect() as db:
+            db.execute("pragma journal_mode=wal")
+            db.execute("create table if not exists fsm (key text primary key, state text, data text)")
+
+    def _connect(self):
+        """Open connection to the database."""
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _query(self, sql, params):
+        """Run query and return first row."""
+        with self._connect() as db:
+            return db.execute(sql, params).fetchone()
+
+    async def _run(self, sql, *params):
+        """Run query in a thread."""
+        return await asyncio.to_thread(self._query, sql, params)
+
+    async def set_state(self, key, state=None):
+        """Set state for the key."""
+        state = state.state if isinstance(state, State) else state
+        await self._run("insert into fsm (key, state) values (?, ?) on conflict (key) do update set state = excluded.state",
+                        self.key_builder.build(key), state)
+
+    async def get_state(self, key):
+        """Get state for the key."""
+        row = await self._run("select state from fsm where key = ?", self.key_builder.build(key))
+        return row[0] if row else None
+
+    async def set_data(self, key, data):
+        """Set data for the key."""
+        await self._run("insert into fsm (key, data) values (?, ?) on conflict (key) do update set data = excluded.data",
+                        self.key_builder.build(key), json.dumps(dict(data)))
+
+    async def get_data(self, key):
+        """Get data for the key."""
+        row = await self._run("select data from fsm where key = ?", self.key_builder.build(key))
+        return json.loads(row[0]) if row and row[0] else {}
+
+    async def close(self):
+        """Nothing to close, connections are opened per query."""
+
+
+class DestinyKeyBuilder(KeyBuilder):
+    """Keys of DefaultKeyBuilder, with destiny added only when it is not default.
+
+    Keys of dialog states stay as they were, other destinies (user locales)
+    get keys of their own.
+    """
+
+    def __init__(self):
+        """Use the default builder for dialog states."""
+        self.plain = DefaultKeyBuilder()
+        self.with_destiny = DefaultKeyBuilder(with_destiny=True)
+
+    def build(self, key, part=None):
+        """Build key for storage."""
+        builder = self.plain if key.destiny == DEFAULT_DESTINY else self.with_destiny
+        return builder.build(key, part)
+
+
+def create_storage(backend, url=""):
+    """Make FSM storage by backend name: memory, sqlite (url is file path) or redis (url is redis://...)."""
+    match backend:
+        case "memory":
+            return MemoryStorage()
+        case "sqlite":
+            return SQLiteStorage(url or "fsm.sqlite3")
+        case "redis":
+            from aiogram.fsm.storage.redis import RedisStorage  # нужен пакет redis
+            return RedisStorage.from_url(url or "redis://localhost:6379/0", key_builder=DestinyKeyBuilder())
+    raise ValueError(f"Unknown FSM storage: {backend}")
@@ -0,0 +1,109 @@
+"""Throttling of updates from one user."""
+import time
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery
+
+from Bot.i18n import gettext as _
+from Bot.metrics import Counter
+
+
+THROTTLED = Counter("bot_throttled_total", "Updates dropped by throttling.", ("handler", "reason"))
+
+
+class TokenBucket:
+    """Up to burst tokens refilled at rate tokens per second."""
+
+    def __init__(self, rate, burst, now):
+        """Start with a full bucket."""
+        self.rate, self.burst = rate, burst
+        self.tokens = burst
+        self.updated = now
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now):
+        """Take a token, False if the bucket is empty."""
+        self._refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def full(self, now):
+        """Check if the bucket has refilled completely."""
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Inner middleware limiting how often one user calls handlers.
+
+    Every user has a token bucket per handler. Handlers with
+    flags={"throttle": name} share the bucket name and its (rate, burst) from
+    limits. A press of the button that is being processed or was processed
+    less than window seconds ago is dropped. Dropped callbacks are answered at
+    once, so the button stops spinning and is not pressed again.
+    """
+
+    def __init__(self, rate=1.0, burst=5, window=1.0, limits=None, clock=time.monotonic):
+        """Allow burst updates at once and rate updates per second after that."""
+        self.rate, self.burst, self.window = rate, burst, window
+        self.limits = limits or {}
+        self.clock = clock
+        self.buckets = {}  # (id пользователя, имя) -> TokenBucket
+        self.presses = {}  # (id пользователя, данные кнопки) -> когда обработано, None - обрабатывается
+        self._cleaned = clock()
+
+    async def __call__(self, handler, event, data):
+        """Process update or drop it if the user is too fast."""
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        name = data["handler"].callback.__name__
+        now = self.clock()
+        self._cleanup(now)
+        press = (user.id, event.data) if isinstance(event, CallbackQuery) else None
+        if press in self.presses:
+            done = self.presses[press]
+            if done is None or now - done < self.window:
+                return await self._reject(event, name, "duplicate")
+        bucket_name = get_flag(data, "throttle") or name
+        bucket = self.buckets.get((user.id, bucket_name))
+        if bucket is None:
+            rate, burst = self.limits.get(bucket_name, (self.rate, self.burst))
+            bucket = self.buckets[(user.id, bucket_name)] = TokenBucket(rate, burst, now)
+        if not bucket.take(now):
+            return await self._reject(event, name, "rate")
+        if press is None:
+            return await handler(event, data)
+        self.presses[press] = None
+        try:
+            return await handler(event, data)
+        finally:
+            self.presses[press] = self.clock()
+
+    async def _reject(self, event, handler, reason):
+        THROTTLED.inc(handler, reason)
+        if isinstance(event, CallbackQuery):
+            try:
+                # повторное нажатие просто гасим, о слишком частых предупреждаем
+                await event.answer(_("Слишком часто, подождите немного.") if reason == "rate" else None)
+            except Exception as e:
+                print(f"Ошибка ответа на нажатие: {e}")
+
+    def _cleanup(self, now):
+        """Forget full buckets and old presses once a minute, so memory does not grow."""
+        if now - self._cleaned < 60:
+            return
+        self._cleaned = now
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if not bucket.full(now)}
+        self.presses = {key: done for key, done in self.presses.items() if done is None or now - done < self.window}
+
+
+def setup_throttling(dp, middleware):
+    """Register throttling middleware for messages and callbacks."""
+    for observer in (dp.message, dp.callback_query):
+        observer.middleware(middleware)
@@ -0,0 +1,31 @@
+"""Webhook serving mode."""
+import asyncio
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+
+def create_app(dp, bot, path, secret=None, handle_in_background=True):
+    """Make aiohttp application that feeds updates from path to the dispatcher.
+
+    Requests without matching X-Telegram-Bot-Api-Secret-Token header are rejected.
+    """
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret,
+                         handle_in_background=handle_in_background).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(dp, bot, base_url, path, host, port, secret=None):
+    """Register webhook and serve updates until cancelled."""
+    async def set_webhook():
+        await bot.set_webhook(base_url.rstrip("/") + path, secret_token=secret)
+
+    dp.startup.register(set_webhook)
+    runner = web.AppRunner(create_app(dp, bot, path, secret))
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()  # дожидается обработки начатых запросов и останавливает диспетчер
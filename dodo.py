@@ -14,7 +14,7 @@ def task_style():
 def task_pot():
     """Build pot."""
     return {
-        'actions': ["pybabel extract . -o Bot/TG_bot.pot"],
+        'actions': ["pybabel extract Bot -o Bot/TG_bot.pot"],
         'file_dep': [str(i) for i in Path("./Bot").glob("*.py")],
         'targets': ["Bot/TG_bot.pot"],
     }
@@ -52,7 +52,25 @@ def task_test():
     """Run tests."""
     return {
         'task_dep': ['il8n', "style"],
-        "actions": ["LANG=ru_RU.UTF-8 LC_ALL=ru_RU.UTF-8 pytest -v ./tests/test_handlers.py"],
+        "actions": ["LANG=ru_RU.UTF-8 LC_ALL=ru_RU.UTF-8 pytest -v ./tests"],
+        "verbosity": 2,
+    }
+
+
+def task_bench():
+    """Run handlers benchmark."""
+    return {
+        "actions": ["python -m tests.bench_handlers --startup 5 --out bench.json"],
+        "targets": ["bench.json"],
+        "verbosity": 2,
+    }
+
+
+def task_load():
+    """Replay synthetic exam week load."""
+    return {
+        "actions": ["python -m tests.load_replay --scenario schedule --users 500 --window 10 --speed 1 --out load.json"],
+        "targets": ["load.json"],
         "verbosity": 2,
     }
 
@@ -0,0 +1,18 @@
+-- Расписание вместе с временем пары, кабинетом и преподавателем.
+-- Позволяет получить день одним запросом вместо отдельных запросов на каждую пару.
+create or replace view schedule_full as
+select s.id,
+       s.day_of_week,
+       s.pair_number,
+       s.week_type,
+       s.subject,
+       t.start_time,
+       t.end_time,
+       c.number as classroom,
+       te.name as teacher
+from schedule s
+left join time_slots t on t.pair_number = s.pair_number
+left join classrooms c on c.id = s.classroom_id
+left join teachers te on te.id = s.teacher_id;
+
+create index if not exists schedule_day_pair_idx on schedule (day_of_week, pair_number);
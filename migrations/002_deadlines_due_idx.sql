@@ -0,0 +1,2 @@
+-- Планировщик напоминаний читает только ещё не отправленные дедлайны из ближайшего окна.
+create index if not exists deadlines_due_idx on deadlines (deadline_at) where not notified;
@@ -0,0 +1,18 @@
+-- Очередь напоминаний: по записи на каждое смещение (за сутки, за 3 часа, ...) каждого дедлайна.
+-- Записи создаются при сохранении дедлайна, воркер читает только наступившие по индексу fire_at.
+create table if not exists reminder_queue (
+    id bigserial primary key,
+    deadline_id bigint not null references deadlines (id) on delete cascade,
+    fire_at timestamptz not null,
+    sent boolean not null default false
+);
+
+create index if not exists reminder_queue_due_idx on reminder_queue (fire_at) where not sent;
+
+-- Дедлайны, созданные до появления очереди, получают прежнее напоминание за минуту.
+insert into reminder_queue (deadline_id, fire_at)
+select id, deadline_at - interval '1 minute'
+from deadlines
+where not notified and deadline_at > now();
+
+drop index if exists deadlines_due_idx;
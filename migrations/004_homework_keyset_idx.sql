@@ -0,0 +1,2 @@
+-- Постраничный просмотр ДЗ идёт по курсору (due_date, id) внутри предмета.
+create index if not exists homework_subject_due_idx on homework (subject_id, due_date, id);
@@ -0,0 +1,2 @@
+-- Список дедлайнов пользователя читается постранично в порядке deadline_at.
+create index if not exists deadlines_user_idx on deadlines (telegram_id, deadline_at);
@@ -0,0 +1,2 @@
+-- Пользователь ищется и перерегистрируется (upsert) по неизменному tg_id.
+alter table users add constraint users_tg_id_key unique (tg_id);
@@ -0,0 +1,6 @@
+-- Аренда записей очереди: несколько воркеров делят напоминания без дублей.
+-- Воркер занимает наступившие записи условным update (свободна или аренда истекла),
+-- после падения воркера его записи снова свободны по истечении locked_until.
+alter table reminder_queue
+    add column if not exists locked_by text,
+    add column if not exists locked_until timestamptz;
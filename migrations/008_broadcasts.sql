@@ -0,0 +1,20 @@
+-- Рассылки администратора всем зарегистрированным пользователям.
+-- Получатели сохраняются вместе с рассылкой, статус обновляется после каждой пачки,
+-- поэтому после перезапуска бот досылает только оставшиеся сообщения.
+create table if not exists broadcasts (
+    id bigserial primary key,
+    text text not null,
+    created_by bigint not null,
+    created_at timestamptz not null default now(),
+    finished_at timestamptz
+);
+
+create table if not exists broadcast_recipients (
+    broadcast_id bigint not null references broadcasts (id) on delete cascade,
+    tg_id text not null,
+    status text not null default 'pending' check (status in ('pending', 'sent', 'failed')),
+    primary key (broadcast_id, tg_id)
+);
+
+create index if not exists broadcast_recipients_pending_idx
+    on broadcast_recipients (broadcast_id) where status = 'pending';
@@ -0,0 +1,4 @@
+-- Подписка на ежедневную сводку: расписание на сегодня, ДЗ и дедлайны на двое суток.
+alter table users add column if not exists digest boolean not null default false;
+
+create index if not exists users_digest_idx on users (tg_id) where digest;
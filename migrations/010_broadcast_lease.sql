@@ -0,0 +1,6 @@
+-- Аренда рассылок: при нескольких процессах рассылку отправляет только тот, кто её занял.
+-- Аренда продлевается перед каждой пачкой, после падения процесса рассылку
+-- подхватывает другой по истечении locked_until.
+alter table broadcasts
+    add column if not exists locked_by text,
+    add column if not exists locked_until timestamptz;
@@ -0,0 +1,8 @@
+-- День последней отправленной сводки. Каждый процесс бота запускает задачу по расписанию,
+-- но сводку отправляет только тот, кто первым условным update записал сегодняшнюю дату.
+create table if not exists digest_runs (
+    id int primary key check (id = 1),
+    sent_on date
+);
+
+insert into digest_runs (id) values (1) on conflict do nothing;
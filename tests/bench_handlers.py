@@ -0,0 +1,176 @@
+"""Latency benchmark of handlers against the fake supabase backend.
+
+Run ``python -m tests.bench_handlers --latency 0.02 --out bench.json`` and
+compare JSON files of two commits: wall time grows with latency times the
+number of sequential round-trips, queries_per_run shows the round-trips.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytz
+
+for name, value in (("BOT_TOKEN", "42:BENCH"), ("URL", "http://localhost"), ("KEY", "bench")):
+    os.environ.setdefault(name, value)
+
+from Bot import handlers  # noqa: E402
+from Bot.cache import LRUCache, RenderCache  # noqa: E402
+from Bot.reference import ReferenceData  # noqa: E402
+from Bot.reminders import ReminderScheduler  # noqa: E402
+from Bot.repository import Repository  # noqa: E402
+from tests.fake_supabase import FakeSupabase, seed_tables  # noqa: E402
+
+
+def callback(data="", user_id=1000, user_name="student0"):
+    """Make callback query mock."""
+    mock_callback = MagicMock()
+    mock_callback.data = data
+    mock_callback.from_user.id = user_id
+    mock_callback.from_user.username = user_name
+    mock_callback.message.answer = AsyncMock()
+    mock_callback.message.edit_text = AsyncMock()
+    mock_callback.answer = AsyncMock()
+    return mock_callback
+
+
+def message(text, user_id, user_name):
+    """Make message mock."""
+    mock_message = MagicMock()
+    mock_message.text = text
+    mock_message.from_user.id = user_id
+    mock_message.from_user.username = user_name
+    mock_message.answer = AsyncMock()
+    return mock_message
+
+
+async def measure(fake, run, iterations, setup=None):
+    """Run scenario after one warm-up run and collect wall time and query count."""
+    await run()
+    times, queries = [], []
+    for _ in range(iterations):
+        if setup:
+            setup()
+        before = len(fake.queries)
+        start = time.perf_counter()
+        await run()
+        times.append(time.perf_counter() - start)
+        queries.append(len(fake.queries) - before)
+    return {
+        "iterations": iterations,
+        "queries_per_run": statistics.mean(queries),
+        "mean_ms": round(statistics.mean(times) * 1000, 3),
+        "p50_ms": round(statistics.median(times) * 1000, 3),
+        "max_ms": round(max(times) * 1000, 3),
+    }
+
+
+async def run_benchmarks(latency=0.02, iterations=20):
+    """Run all scenarios and return results."""
+    fake = FakeSupabase(seed_tables(), latency=latency)
+    repo = Repository(fake)
+    cache = RenderCache(ttl=3600)
+    new_users = iter(range(10 ** 6, 2 * 10 ** 6))
+
+    async def schedule_cold():
+        cache.invalidate()
+        await handlers.get_schedule(1, 'понедельник')
+
+    async def schedule_warm():
+        await handlers.get_schedule(1, 'понедельник')
+
+    async def homeworks():
+        await handlers.show_homeworks(callback("view_subject_1"), AsyncMock())
+
+    async def deadlines():
+        await handlers.check_deadlines_list(callback("check_list"), AsyncMock())
+
+    async def registration_flow():
+        user_id = next(new_users)
+        await handlers.registration(callback("registration", user_id, f"new{user_id}"), AsyncMock())
+        await handlers.process_name(message("Новый студент", user_id, f"new{user_id}"), AsyncMock())
+        await handlers.registration(callback("registration", user_id, f"new{user_id}"), AsyncMock())
+
+    def unsend_reminders():
+        for row in fake.tables["reminder_queue"]:
+            row["sent"] = False
+            row["locked_until"] = None
+
+    async def reminder_tick():
+        scheduler = ReminderScheduler(repo)
+        now = datetime.now(pytz.UTC)
+        await scheduler.load(now)
+        await scheduler.deliver(await scheduler.claim(scheduler.pop_due(now + timedelta(seconds=1)), now), AsyncMock())
+
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "SCHEDULE_CACHE", cache), \
+            patch.object(handlers, "REFERENCE", ReferenceData(repo)), \
+            patch.object(handlers, "PROFILES", LRUCache(maxsize=1024)):
+        results = {
+            "get_schedule_cold": await measure(fake, schedule_cold, iterations),
+            "get_schedule_warm": await measure(fake, schedule_warm, iterations),
+            "show_homeworks": await measure(fake, homeworks, iterations),
+            "check_deadlines_list": await measure(fake, deadlines, iterations),
+            "registration_flow": await measure(fake, registration_flow, iterations),
+            "reminder_tick": await measure(fake, reminder_tick, iterations, setup=unsend_reminders),
+        }
+    repo.close()
+    return results
+
+
+STARTUP = ("import time, sys; start = time.perf_counter(); import Bot.__main__; "
+           "print(time.perf_counter() - start, 'supabase' in sys.modules)")
+
+
+def measure_startup(runs):
+    """Measure import of the bot in fresh interpreters."""
+    times, modules = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", STARTUP], capture_output=True, text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+        modules.add(out[1] == "True")
+    return {
+        "runs": runs,
+        "p50_ms": round(statistics.median(times) * 1000, 1),
+        "min_ms": round(min(times) * 1000, 1),
+        "supabase_imported": any(modules),
+    }
+
+
+def commit():
+    """Get current commit if available."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    """Run benchmarks and write JSON."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per query")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--startup", type=int, default=0, help="also measure import time in this many fresh processes")
+    parser.add_argument("--out", help="JSON file, stdout by default")
+    args = parser.parse_args(argv)
+
+    report = {"commit": commit(), "latency": args.latency,
+              "results": asyncio.run(run_benchmarks(args.latency, args.iterations))}
+    if args.startup:
+        report["startup"] = measure_startup(args.startup)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as out:
+            out.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
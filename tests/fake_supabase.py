@@ -0,0 +1,309 @@
+"""In-process fake of the supabase table API with seeded data and latency."""
+
+import re
+import threading
+import time
+from copy import deepcopy
+from datetime import datetime
+from types import SimpleNamespace
+
+
+def _value(row_value, raw):
+    """Convert filter value from query to the type of the row value."""
+    if isinstance(raw, str):
+        if raw == "null":
+            return None
+        if isinstance(row_value, bool):
+            return raw == "true"
+        if isinstance(row_value, int):
+            return int(raw)
+    return raw
+
+
+def _comparable(value):
+    """Make timestamps with different offsets comparable."""
+    if isinstance(value, str) and len(value) > 10 and value[4] == "-" and value[10] in "T ":
+        try:
+            moment = datetime.fromisoformat(value)
+            if moment.tzinfo is not None:
+                return moment.timestamp()
+        except ValueError:
+            pass
+    return value
+
+
+OPS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a is not None and _comparable(a) > _comparable(b),
+    "gte": lambda a, b: a is not None and _comparable(a) >= _comparable(b),
+    "lt": lambda a, b: a is not None and _comparable(a) < _comparable(b),
+    "lte": lambda a, b: a is not None and _comparable(a) <= _comparable(b),
+    "is": lambda a, b: a is b,
+}
+
+
+def _split(expression):
+    """Split PostgREST logic expression by top level commas."""
+    parts, depth, current = [], 0, ""
+    for char in expression:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += {"(": 1, ")": -1}.get(char, 0)
+        current += char
+    parts.append(current)
+    return parts
+
+
+def _logic(expression, row, combine=any):
+    """Evaluate PostgREST or/and expression for the row."""
+    results = []
+    for part in _split(expression):
+        if part.startswith("and("):
+            results.append(_logic(part[4:-1], row, all))
+        elif part.startswith("or("):
+            results.append(_logic(part[3:-1], row, any))
+        else:
+            column, op, raw = part.split(".", 2)
+            results.append(OPS[op](row.get(column), _value(row.get(column), raw)))
+    return combine(results)
+
+
+class FakeQuery:
+    """Query builder of one table."""
+
+    def __init__(self, backend, table):
+        """Start query of the table."""
+        self.backend = backend
+        self.table = table
+        self.action = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.orders = []
+        self.window = None
+
+    def select(self, columns="*", count=None):
+        """Select columns and embedded relations."""
+        self.columns = columns
+        return self
+
+    def insert(self, payload):
+        """Insert row or rows."""
+        self.action, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=""):
+        """Insert or update rows by on_conflict column."""
+        self.action, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload):
+        """Update matching rows."""
+        self.action, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        """Delete matching rows."""
+        self.action = "delete"
+        return self
+
+    def _filter(self, column, op, value):
+        self.filters.append(lambda row: OPS[op](row.get(column), _value(row.get(column), value)))
+        return self
+
+    def eq(self, column, value):
+        """Filter column = value."""
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        """Filter column <> value."""
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        """Filter column > value."""
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        """Filter column >= value."""
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        """Filter column < value."""
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        """Filter column <= value."""
+        return self._filter(column, "lte", value)
+
+    def is_(self, column, value):
+        """Filter column is value."""
+        return self._filter(column, "is", value)
+
+    def in_(self, column, values):
+        """Filter column in values."""
+        values = list(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def or_(self, expression):
+        """Filter by PostgREST logic expression."""
+        self.filters.append(lambda row: _logic(expression, row))
+        return self
+
+    def order(self, column, desc=False):
+        """Order by column."""
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        """Take first count rows."""
+        self.window = (0, count)
+        return self
+
+    def range(self, start, end):
+        """Take rows from start to end inclusive."""
+        self.window = (start, end - start + 1)
+        return self
+
+    def execute(self):
+        """Run query after configured latency."""
+        time.sleep(self.backend.latency)
+        with self.backend.lock:
+            self.backend.queries.append(self.table)
+            return SimpleNamespace(data=getattr(self, "_" + self.action)())
+
+    def _matching(self):
+        return [row for row in self.backend.rows(self.table) if all(check(row) for check in self.filters)]
+
+    def _select(self):
+        rows = self._matching()
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: (row.get(column) is None, _comparable(row.get(column))), reverse=desc)
+        if self.window:
+            start, count = self.window
+            rows = rows[start:start + count]
+        return [self.backend.project(self.table, row, self.columns) for row in rows]
+
+    def _insert(self):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        return [deepcopy(self.backend.add(self.table, row)) for row in rows]
+
+    def _upsert(self):
+        rows = self.payload if isinstance(self.payload, list) else [self.payload]
+        result = []
+        for row in rows:
+            existing = [r for r in self.backend.tables[self.table] if r.get(self.on_conflict) == row[self.on_conflict]]
+            if existing:
+                existing[0].update(row)
+                result.append(deepcopy(existing[0]))
+            else:
+                result.append(deepcopy(self.backend.add(self.table, row)))
+        return result
+
+    def _update(self):
+        rows = self._matching()
+        for row in rows:
+            row.update(self.payload)
+        return deepcopy(rows)
+
+    def _delete(self):
+        rows = self._matching()
+        self.backend.tables[self.table] = [row for row in self.backend.tables[self.table] if row not in rows]
+        return deepcopy(rows)
+
+
+class FakeSupabase:
+    """Client with tables in memory.
+
+    Every ``execute()`` sleeps ``latency`` seconds in the calling thread, like a
+    real round-trip, and is recorded in ``queries``. The ``schedule_full`` view
+    is computed from the seeded tables.
+    """
+
+    RELATION = re.compile(r"(\w+)\(([^)]*)\)")
+
+    def __init__(self, tables, latency=0.0):
+        """Copy tables, wait latency seconds on every query."""
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+        self.latency = latency
+        self.queries = []
+        self.lock = threading.Lock()
+
+    def table(self, name):
+        """Start query of the table."""
+        return FakeQuery(self, name)
+
+    def add(self, table, row):
+        """Add row with generated id."""
+        rows = self.tables.setdefault(table, [])
+        row = dict(row)
+        if "id" not in row:
+            row["id"] = max((r["id"] for r in rows), default=0) + 1
+        rows.append(row)
+        return row
+
+    def rows(self, table):
+        """Get rows of table or view."""
+        if table == "schedule_full":
+            return self._schedule_full()
+        return self.tables.get(table, [])
+
+    def project(self, table, row, columns):
+        """Take selected columns and embedded relations of the row."""
+        result = {}
+        for relation, fields in self.RELATION.findall(columns):
+            parent = next(r for r in self.tables[relation] if r["id"] == row[relation[:-1] + "_id"])
+            result[relation] = {field.strip(): parent[field.strip()] for field in fields.split(",")}
+        plain = self.RELATION.sub("", columns)
+        names = [name.strip() for name in plain.split(",") if name.strip()]
+        if "*" in names:
+            result.update(row)
+        else:
+            result.update({name: row.get(name) for name in names})
+        return deepcopy(result)
+
+    def _schedule_full(self):
+        slots = {r["pair_number"]: r for r in self.tables["time_slots"]}
+        classrooms = {r["id"]: r["number"] for r in self.tables["classrooms"]}
+        teachers = {r["id"]: r["name"] for r in self.tables["teachers"]}
+        return [{**row,
+                 "start_time": slots[row["pair_number"]]["start_time"],
+                 "end_time": slots[row["pair_number"]]["end_time"],
+                 "classroom": classrooms.get(row["classroom_id"]),
+                 "teacher": teachers.get(row["teacher_id"])}
+                for row in self.tables["schedule"]]
+
+
+def seed_tables(users=50, homeworks_per_subject=30, deadlines=200, due_reminders=20):
+    """Make tables with realistic amount of data."""
+    now = datetime.now().astimezone()
+    day = 24 * 3600
+    tables = {
+        "subjects": [{"id": i, "name": f"Предмет {i}"} for i in range(1, 9)],
+        "classrooms": [{"id": i, "number": f"П-{i}"} for i in range(1, 6)],
+        "teachers": [{"id": i, "name": f"Преподаватель {i}"} for i in range(1, 6)],
+        "time_slots": [{"pair_number": n, "start_time": f"{7 + 2 * n:02}:00:00", "end_time": f"{8 + 2 * n:02}:35:00"}
+                       for n in range(1, 7)],
+        "schedule": [{"id": day_of_week * 10 + n, "day_of_week": day_of_week, "pair_number": n,
+                      "week_type": (None, "even", "odd")[n % 3], "subject": f"Предмет {n}",
+                      "classroom_id": n % 5 + 1, "teacher_id": n % 5 + 1 if n % 4 else None}
+                     for day_of_week in range(1, 6) for n in range(1, 5)],
+        "users": [{"id": i, "tg_id": str(1000 + i), "name": f"Студент {i}", "tg_username": f"student{i}"}
+                  for i in range(users)],
+        "homework": [{"id": subject * 1000 + i, "subject_id": subject, "description": f"Задание {i}",
+                      "due_date": datetime.fromtimestamp(now.timestamp() + (i - 10) * day).date().isoformat(),
+                      "is_completed": False, "tg_id": "1000"}
+                     for subject in range(1, 9) for i in range(homeworks_per_subject)],
+        "deadlines": [{"id": i, "telegram_id": 1000 + i % 5, "title": f"Дедлайн {i}", "notified": False,
+                       "deadline_at": datetime.fromtimestamp(now.timestamp() + (i + 1) * 3600).astimezone().isoformat()}
+                      for i in range(deadlines)],
+    }
+    tables["digest_runs"] = [{"id": 1, "sent_on": None}]
+    tables["reminder_queue"] = [{"id": i, "deadline_id": i, "sent": False,
+                                 "fire_at": datetime.fromtimestamp(now.timestamp() - 1).astimezone().isoformat()}
+                                for i in range(due_reminders)]
+    return tables
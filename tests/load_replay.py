@@ -0,0 +1,244 @@
+"""Replay recorded or synthetic updates through the Dispatcher.
+
+Updates go through ``Dispatcher.feed_update`` with the real handlers, a stub
+Bot that never talks to Telegram and the fake supabase backend::
+
+    python -m tests.load_replay --scenario schedule --users 500 --window 10
+    python -m tests.load_replay --file updates.jsonl --rate 200
+
+Files are written by Bot.recorder.UpdateRecorder (``record_updates`` setting)
+or by ``--synthesize``. The report has throughput, p50/p99 latency and peak
+memory.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import patch
+
+for name, value in (("BOT_TOKEN", "42:LOAD"), ("URL", "http://localhost"), ("KEY", "load")):
+    os.environ.setdefault(name, value)
+
+from aiogram import Bot, Dispatcher  # noqa: E402
+from aiogram.client.session.base import BaseSession  # noqa: E402
+from aiogram.fsm.storage.memory import MemoryStorage  # noqa: E402
+from aiogram.methods import EditMessageText, SendMessage  # noqa: E402
+from aiogram.types import Chat, Message, Update  # noqa: E402
+
+from Bot import handlers  # noqa: E402
+from Bot.cache import LRUCache, RenderCache  # noqa: E402
+from Bot.i18n import LocaleMiddleware  # noqa: E402
+from Bot.reference import ReferenceData  # noqa: E402
+from Bot.repository import Repository  # noqa: E402
+from tests.fake_supabase import FakeSupabase, seed_tables  # noqa: E402
+
+
+class StubSession(BaseSession):
+    """Bot API session answering every method locally after latency seconds."""
+
+    def __init__(self, latency=0.0):
+        """Answer after latency seconds."""
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+        self.message_ids = itertools.count(1)
+
+    async def make_request(self, bot, method, timeout=None):
+        """Return plausible result of the method."""
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if isinstance(method, (SendMessage, EditMessageText)):
+            return Message(message_id=next(self.message_ids), date=datetime.now(),
+                           chat=Chat(id=method.chat_id or 0, type="private"), text=method.text)
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        """Download nothing."""
+        yield b""
+
+    async def close(self):
+        """Nothing to close."""
+
+
+def _user(user_id):
+    return {"id": user_id, "is_bot": False, "first_name": f"Student {user_id}", "username": f"student{user_id - 1000}"}
+
+
+def command(user_id, text):
+    """Make message update from user."""
+    return {"message": {"message_id": 1, "date": 1750000000, "text": text, "from": _user(user_id),
+                        "chat": {"id": user_id, "type": "private"}}}
+
+
+def button(user_id, data):
+    """Make callback query update of a button under a bot message."""
+    return {"callback_query": {"id": str(user_id), "chat_instance": str(user_id), "data": data, "from": _user(user_id),
+                               "message": {"message_id": 2, "date": 1750000000, "text": "...",
+                                           "chat": {"id": user_id, "type": "private"}}}}
+
+
+SCENARIOS = {
+    "schedule": [lambda user_id: command(user_id, "/schedule"), lambda user_id: button(user_id, "monday")],
+    "deadlines": [lambda user_id: command(user_id, "/deadlines"), lambda user_id: button(user_id, "check_list")],
+}
+
+
+def synthesize(scenario, users, window, seed=0):
+    """Make records of users going through scenario steps within window seconds."""
+    rng = random.Random(seed)
+    records = []
+    for user_id in range(1000, 1000 + users):
+        moment = rng.uniform(0, window / 2)
+        for step in SCENARIOS[scenario]:
+            records.append({"t": moment, "update": step(user_id)})
+            moment += rng.uniform(0, window / 2 / len(SCENARIOS[scenario]))
+    records.sort(key=lambda record: record["t"])
+    for update_id, record in enumerate(records, 1):
+        record["update"]["update_id"] = update_id
+    return records
+
+
+def read_records(path):
+    """Read JSONL file of records."""
+    with open(path, encoding="utf-8") as records:
+        return [json.loads(line) for line in records if line.strip()]
+
+
+def write_records(path, records):
+    """Write records as JSONL."""
+    with open(path, "w", encoding="utf-8") as out:
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+@contextmanager
+def fake_backend(latency):
+    """Point handlers to the fake supabase backend with empty caches."""
+    fake = FakeSupabase(seed_tables(), latency=latency)
+    repo = Repository(fake)
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "SCHEDULE_CACHE", RenderCache(ttl=3600)), \
+            patch.object(handlers, "REFERENCE", ReferenceData(repo)), \
+            patch.object(handlers, "PROFILES", LRUCache(maxsize=1024)):
+        yield fake
+    repo.close()
+
+
+def percentile(values, share):
+    """Get value below which the share of values lies."""
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+async def replay(dp, bot, records, rate=None, speed=None):
+    """Feed records to the dispatcher and measure every update.
+
+    With rate updates are sent at that many per second, with speed the
+    recorded timing is kept, sped up speed times, otherwise all at once.
+    """
+    latencies, errors = [], 0
+    start_t = records[0]["t"] if records else 0
+
+    async def feed(update):
+        nonlocal errors
+        start = time.perf_counter()
+        try:
+            await dp.feed_update(bot, update)
+        except Exception:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    started = time.perf_counter()
+    for number, record in enumerate(records):
+        if rate:
+            due = number / rate
+        elif speed:
+            due = (record["t"] - start_t) / speed
+        else:
+            due = 0
+        delay = due - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(feed(Update.model_validate(record["update"]))))
+    await asyncio.gather(*tasks)
+    wall = time.perf_counter() - started
+    return latencies, errors, wall
+
+
+async def run_load(records, rate=None, speed=None, db_latency=0.005, api_latency=0.0, trace_memory=False):
+    """Replay records against the real handlers and return the report."""
+    session = StubSession(api_latency)
+    bot = Bot("42:LOAD", session=session)
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.update.outer_middleware(LocaleMiddleware())
+    dp.include_router(handlers.router)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        with fake_backend(db_latency) as fake:
+            latencies, errors, wall = await replay(dp, bot, records, rate, speed)
+    finally:
+        dp.sub_routers.remove(handlers.router)
+        handlers.router._parent_router = None  # роутер можно подключить к следующему диспетчеру
+    report = {
+        "updates": len(records),
+        "errors": errors,
+        "wall_s": round(wall, 3),
+        "throughput_per_s": round(len(records) / wall, 1) if wall else None,
+        "p50_ms": round(statistics.median(latencies) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        "max_ms": round(max(latencies) * 1000, 3) if latencies else None,
+        "db_queries": len(fake.queries),
+        "api_calls": session.calls,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if trace_memory:
+        report["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 1)
+        tracemalloc.stop()
+    return report
+
+
+def main(argv=None):
+    """Parse arguments, replay and print or write JSON report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--file", help="JSONL file with recorded updates")
+    source.add_argument("--scenario", choices=sorted(SCENARIOS))
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--window", type=float, default=10, help="seconds in which users go through the scenario")
+    parser.add_argument("--synthesize", help="only write synthetic updates to this JSONL file")
+    pace = parser.add_mutually_exclusive_group()
+    pace.add_argument("--rate", type=float, help="updates per second")
+    pace.add_argument("--speed", type=float, help="replay recorded timing this many times faster")
+    parser.add_argument("--db-latency", type=float, default=0.005, help="seconds per database query")
+    parser.add_argument("--api-latency", type=float, default=0.0, help="seconds per Bot API call")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak of traced Python memory")
+    parser.add_argument("--out", help="JSON file, stdout by default")
+    args = parser.parse_args(argv)
+
+    records = read_records(args.file) if args.file else synthesize(args.scenario, args.users, args.window)
+    if args.synthesize:
+        write_records(args.synthesize, records)
+        return
+    report = asyncio.run(run_load(records, args.rate, args.speed, args.db_latency, args.api_latency, args.tracemalloc))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as out:
+            out.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,51 @@
+"""Round-trip budget of handlers measured by the benchmark suite."""
+
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+from tests.bench_handlers import run_benchmarks, measure_startup, main
+
+
+QUERY_BUDGET = {
+    "get_schedule_cold": 1,
+    "get_schedule_warm": 0,
+    "show_homeworks": 1,
+    "check_deadlines_list": 1,
+    "registration_flow": 2,
+    "reminder_tick": 3,  # загрузка, аренда, отметка об отправке
+}
+
+
+@pytest.mark.asyncio
+async def test_query_budget():
+    """Число обращений к БД на один вызов не превышает бюджет"""
+
+    results = await run_benchmarks(latency=0, iterations=3)
+    assert {name: result["queries_per_run"] for name, result in results.items()} == QUERY_BUDGET
+
+
+def test_json_report(tmp_path):
+    out = tmp_path / "bench.json"
+    main(["--latency", "0", "--iterations", "1", "--out", str(out)])
+    report = json.loads(out.read_text())
+    assert report["latency"] == 0
+    assert set(report["results"]) == set(QUERY_BUDGET)
+
+
+def test_import_is_lazy():
+    """Импорт бота не читает настройки и не создаёт клиент БД"""
+
+    env = {name: value for name, value in os.environ.items() if name not in ("BOT_TOKEN", "URL", "KEY")}
+    code = ("import sys, Bot.__main__, Bot.services as s; "
+            "print('supabase' in sys.modules, 'apscheduler' in sys.modules, s.get_settings.cache_info().currsize)")
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout
+    assert out.split() == ["False", "False", "0"]
+
+
+def test_startup_report():
+    startup = measure_startup(1)
+    assert startup["runs"] == 1 and startup["p50_ms"] > 0
+    assert not startup["supabase_imported"]
@@ -0,0 +1,180 @@
+"""Tests for admin broadcasts."""
+
+import asyncio
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from Bot import handlers
+from Bot.broadcast import Broadcaster, RateLimiter
+from Bot.repository import Repository
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+class FakeTelegram:
+    """Records messages, asks to retry or refuses for chosen chats."""
+
+    def __init__(self, retry=(), blocked=()):
+        self.retry = set(retry)
+        self.blocked = set(blocked)
+        self.messages = []
+        self.times = []
+
+    async def send_message(self, chat_id, text):
+        method = SendMessage(chat_id=chat_id, text=text)
+        if chat_id in self.blocked:
+            raise TelegramForbiddenError(method, "bot was blocked by the user")
+        if chat_id in self.retry:
+            self.retry.discard(chat_id)
+            raise TelegramRetryAfter(method, "Too Many Requests", retry_after=1)
+        self.times.append(time.monotonic())
+        self.messages.append((chat_id, text))
+
+
+def backend(users=30):
+    fake = FakeSupabase(seed_tables(users=users))
+    fake.tables["users"].append({"id": 999, "tg_id": None, "name": "Без tg_id", "tg_username": "legacy"})
+    return fake, Repository(fake)
+
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_every_registered_user():
+    fake, repo = backend()
+    telegram = FakeTelegram(retry=[1003], blocked=[1005])
+    broadcaster = Broadcaster(repo, rate=1000, batch=7)
+
+    broadcast, count = await broadcaster.create("Пара перенесена в П-5", created_by=1)
+    counters = await broadcaster.run(broadcast, telegram.send_message)
+
+    assert count == 30
+    assert sorted(chat for chat, _ in telegram.messages) == [1000 + i for i in range(30) if i != 5]
+    assert counters["sent"] == 29 and counters["failed"] == 1 and counters["rate"] > 0
+    statuses = {row["tg_id"]: row["status"] for row in fake.tables["broadcast_recipients"]}
+    assert statuses["1005"] == "failed" and statuses["1003"] == "sent"
+    assert fake.tables["broadcasts"][0]["finished_at"]
+
+
+@pytest.mark.asyncio
+async def test_retry_after_pauses_sending():
+    fake, repo = backend(users=3)
+    telegram = FakeTelegram(retry=[1000])
+    broadcaster = Broadcaster(repo, rate=1000)
+    broadcast, _ = await broadcaster.create("text", created_by=1)
+
+    start = time.monotonic()
+    await broadcaster.run(broadcast, telegram.send_message)
+
+    assert len(telegram.messages) == 3
+    assert min(telegram.times) - start >= 0.9  # остальные тоже ждут retry_after
+
+
+@pytest.mark.asyncio
+async def test_restart_resumes_without_resending():
+    """После перезапуска досылаются только оставшиеся сообщения"""
+
+    fake, repo = backend(users=20)
+    broadcaster = Broadcaster(repo, rate=1000, batch=5)
+    broadcast, _ = await broadcaster.create("text", created_by=1)
+    first = FakeTelegram()
+    calls = 0
+
+    async def crash_after_two_batches(chat_id, text):
+        nonlocal calls
+        calls += 1
+        if calls > 10:
+            await asyncio.sleep(10)
+        await first.send_message(chat_id, text)
+
+    task = asyncio.create_task(broadcaster.run(broadcast, crash_after_two_batches))
+    await asyncio.sleep(0.3)
+    task.cancel()
+
+    interrupted = await repo.unfinished_broadcasts()
+    assert [row["id"] for row in interrupted] == [broadcast["id"]]
+    second = FakeTelegram()
+    counters = await Broadcaster(repo, rate=1000, batch=5).run(interrupted[0], second.send_message)
+
+    assert len(first.messages) == 10 and len(second.messages) == 10
+    assert not {chat for chat, _ in first.messages} & {chat for chat, _ in second.messages}
+    assert counters["sent"] == 20
+    assert await repo.unfinished_broadcasts() == []
+
+
+@pytest.mark.asyncio
+async def test_broadcast_is_sent_by_one_process():
+    """Рассылку, которую отправляет живой процесс, другой процесс не досылает до конца аренды"""
+
+    fake, repo = backend(users=10)
+    sender = Broadcaster(repo, rate=1000, batch=2, worker="a:1")
+    broadcast, _ = await sender.create("text", created_by=1)
+    first, second = FakeTelegram(), FakeTelegram()
+
+    async def slow_send(chat_id, text):
+        await asyncio.sleep(0.02)
+        await first.send_message(chat_id, text)
+
+    task = asyncio.create_task(sender.run(broadcast, slow_send))
+    await asyncio.sleep(0.05)
+    other = Broadcaster(repo, rate=1000, batch=2, worker="b:2")
+    assert await other.run(broadcast, second.send_message) is None
+    counters = await task
+
+    assert counters["sent"] == 10 and len(first.messages) == 10 and second.messages == []
+    assert fake.tables["broadcasts"][0]["locked_by"] == "a:1"
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_taken_over():
+    fake, repo = backend(users=4)
+    broadcast, _ = await Broadcaster(repo, rate=1000).create("text", created_by=1)
+    assert await repo.claim_broadcast(broadcast["id"], "dead:1", "2026-01-01T00:00:00+00:00", "2026-01-01T00:02:00+00:00")
+    telegram = FakeTelegram()
+
+    counters = await Broadcaster(repo, rate=1000, worker="b:2").run(broadcast, telegram.send_message)
+
+    assert counters["sent"] == 4 and len(telegram.messages) == 4
+    assert not await repo.claim_broadcast(broadcast["id"], "b:2", "2026-01-01T00:00:00+00:00", "2100-01-01T00:00:00+00:00")
+
+
+@pytest.mark.asyncio
+async def test_rate_limits():
+    limiter = RateLimiter(rate=100, per_chat=0.2)
+    start = time.monotonic()
+    await asyncio.gather(*(limiter.acquire(chat) for chat in range(21)))
+    assert time.monotonic() - start >= 0.19
+
+    start = time.monotonic()
+    await limiter.acquire("same")
+    await limiter.acquire("same")
+    assert time.monotonic() - start >= 0.19
+
+
+@pytest.mark.asyncio
+async def test_broadcast_command():
+    fake, repo = backend(users=4)
+    message = MagicMock()
+    message.from_user.id = 42
+    message.answer = AsyncMock()
+    message.bot = FakeTelegram()
+    command = MagicMock(args="Завтра пар нет")
+
+    with patch.object(handlers, "BROADCASTS", Broadcaster(repo, rate=1000)):
+        await handlers.broadcast(message, command)
+        await asyncio.gather(*handlers.BACKGROUND)
+
+    message.answer.assert_awaited_once_with("Рассылка поставлена в очередь, получателей: 4")
+    assert message.bot.messages[-1][0] == 42
+    assert message.bot.messages[-1][1].startswith("Рассылка завершена: доставлено 4, ошибок 0")
+    assert len(message.bot.messages) == 5
+
+
+def test_broadcast_is_admin_only():
+    message = MagicMock()
+    message.from_user.id = 7
+    with patch.object(handlers, "config") as config:
+        config.admin_ids = [42]
+        assert not handlers.from_admin(message)
+        config.admin_ids = [7]
+        assert handlers.from_admin(message)
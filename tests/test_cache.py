@@ -0,0 +1,126 @@
+"""Tests for caches."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from Bot.cache import RenderCache, LRUCache
+from Bot import handlers
+
+
+PAIRS = [{"pair_number": 1, "week_type": "odd", "subject": "Матан", "start_time": "09:00:00",
+          "end_time": "10:35:00", "classroom": "П-8", "teacher": None}]
+
+
+def test_hits_and_misses():
+    cache = RenderCache(ttl=60)
+    assert cache.get("key") is None
+    cache.put("key", "value")
+    assert cache.get("key") == "value"
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_expired_value_is_miss():
+    cache = RenderCache(ttl=-1)
+    cache.put("key", "value")
+    assert cache.get("key") is None
+    assert cache.misses == 1
+
+
+def test_invalidate():
+    cache = RenderCache(ttl=60)
+    cache.put("key", "value")
+    cache.invalidate()
+    assert cache.get("key") is None
+
+
+@pytest.mark.asyncio
+async def test_repeat_click_does_not_touch_db():
+    """Повторный запрос расписания отдаётся из кэша без обращения к БД"""
+
+    repo = AsyncMock()
+    repo.day_schedule.return_value = PAIRS
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "SCHEDULE_CACHE", RenderCache(ttl=60)):
+        first = await handlers.get_schedule(1, 'понедельник')
+        second = await handlers.get_schedule(1, 'понедельник')
+        other_locale = await handlers.get_schedule(1, 'понедельник', 'en_US')
+
+    assert first == second == other_locale
+    assert repo.day_schedule.await_count == 2
+
+
+def test_lru_drops_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    assert cache.get(1) == "a"
+    cache.put(3, "c")
+    assert cache.get(2) is None
+    assert cache.get(1) == "a" and cache.get(3) == "c"
+    assert cache.stats() == {"hits": 3, "misses": 1, "size": 2}
+
+
+@pytest.mark.asyncio
+async def test_repeat_registration_check_skips_db():
+    """Повторная проверка регистрации берёт профиль из кэша по tg_id"""
+
+    repo = AsyncMock()
+    repo.user.return_value = [{"tg_id": "111", "name": "Марио", "tg_username": "mario"}]
+    callback = MagicMock()
+    callback.from_user.id = 111
+    callback.from_user.username = "mario"
+    callback.message.answer = AsyncMock()
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "PROFILES", LRUCache(maxsize=8)):
+        await handlers.registration(callback, AsyncMock())
+        await handlers.registration(callback, AsyncMock())
+
+    repo.user.assert_awaited_once_with("111", "mario")
+    repo.bind_tg_id.assert_not_awaited()
+    args, kwargs = callback.message.answer.call_args
+    assert "ФИО: Марио" in args[0]
+
+
+@pytest.mark.asyncio
+async def test_user_added_by_username_is_bound():
+    """Пользователь, заранее добавленный только по username, получает tg_id при первой проверке"""
+
+    repo = AsyncMock()
+    repo.user.return_value = [{"tg_id": None, "name": "Марио", "tg_username": "mario"}]
+    repo.bind_tg_id.return_value = [{"tg_id": "111", "name": "Марио", "tg_username": "mario"}]
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "PROFILES", LRUCache(maxsize=8)):
+        profile = await handlers.get_profile(111, "mario")
+
+    repo.bind_tg_id.assert_awaited_once_with("mario", "111")
+    assert profile["tg_id"] == "111"
+
+
+@pytest.mark.asyncio
+async def test_bind_of_changed_row_keeps_selected_profile():
+    """Если строку по username изменили между выборкой и обновлением, используется выбранная строка"""
+
+    repo = AsyncMock()
+    repo.user.return_value = [{"tg_id": None, "name": "Марио", "tg_username": "mario"}]
+    repo.bind_tg_id.return_value = []
+    profiles = LRUCache(maxsize=8)
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "PROFILES", profiles):
+        profile = await handlers.get_profile(111, "mario")
+
+    assert profile == {"tg_id": "111", "name": "Марио", "tg_username": "mario"}
+    assert repo.user.return_value[0]["tg_id"] is None
+    assert profiles.get(111) is None
+
+
+@pytest.mark.asyncio
+async def test_reregistration_is_single_upsert():
+    repo = AsyncMock()
+    repo.save_user.return_value = [{"tg_id": "1", "name": "Луиджи", "tg_username": "Somebody"}]
+    message = MagicMock()
+    message.from_user.id = 1
+    message.from_user.username = "Somebody"
+    message.text = "Луиджи"
+    message.answer = AsyncMock()
+    profiles = LRUCache(maxsize=8)
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "PROFILES", profiles):
+        await handlers.process_name(message, AsyncMock())
+
+    repo.save_user.assert_awaited_once_with("1", "Луиджи", "Somebody")
+    assert profiles.get(1)["name"] == "Луиджи"
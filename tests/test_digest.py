@@ -0,0 +1,134 @@
+"""Tests for the daily digest."""
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from Bot import handlers
+from Bot.cache import LRUCache, RenderCache
+from Bot.digest import send_digest, start_digest
+from Bot.reference import ReferenceData
+from Bot.repository import Repository
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+def backend(subscribers):
+    fake = FakeSupabase(seed_tables(users=50))
+    for row in fake.tables["users"][:subscribers]:
+        row["digest"] = True
+    return fake, Repository(fake)
+
+
+async def digest(subscribers, now=None):
+    fake, repo = backend(subscribers)
+    reference = ReferenceData(repo)
+    await reference.ensure_loaded()
+    sent = {}
+
+    async def send(chat_id, text):
+        sent[chat_id] = text
+
+    before = len(fake.queries)
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "REFERENCE", reference), \
+            patch.object(handlers, "SCHEDULE_CACHE", RenderCache(ttl=60)):
+        count = await send_digest(send, now or datetime.now(handlers.moscow_tz), rate=1000)
+    return count, sent, len(fake.queries) - before
+
+
+@pytest.mark.asyncio
+async def test_digest_queries_do_not_grow_with_subscribers():
+    """Сводка для всех подписчиков читается несколькими общими запросами"""
+
+    small, _, small_queries = await digest(5)
+    large, sent, large_queries = await digest(40)
+
+    assert (small, large) == (5, 40)
+    assert small_queries == large_queries == 5
+    assert sorted(sent) == [1000 + i for i in range(40)]
+
+
+@pytest.mark.asyncio
+async def test_digest_contents():
+    _, sent, _ = await digest(10)
+
+    own = sent[1001]
+    assert own.startswith("<b>Доброе утро!</b>")
+    assert "Домашнее задание на 2 дня" in own and "Предмет 1: Задание 10" in own
+    assert "Дедлайн 1 —" in own and "Дедлайн 6 —" in own
+    assert "Дедлайн 2 —" not in own  # дедлайны других пользователей не попадают в сводку
+    assert "Дедлайны на 2 дня:</b> нет" in sent[1007]
+
+
+@pytest.mark.asyncio
+async def test_digest_schedule_of_current_week_parity():
+    """В сводке, как и в /today, только пары текущей чётности недели"""
+
+    # 07.09.2026 - понедельник второй, чётной недели семестра
+    _, sent, _ = await digest(1, handlers.moscow_tz.localize(datetime(2026, 9, 7, 7, 30)))
+
+    text = sent[1000]
+    assert "Расписание на понедельник" in text
+    assert "Предмет: <b>Предмет 1</b>" in text and "Предмет: <b>Предмет 3</b>" in text  # чётная и каждую неделю
+    assert "Предмет: <b>Предмет 2</b>" not in text  # нечётная
+
+
+@pytest.mark.asyncio
+async def test_digest_is_sent_once_per_day_by_all_processes():
+    """Несколько процессов запускают задачу одновременно, сводку получают один раз"""
+
+    fake, repo = backend(10)
+    reference = ReferenceData(repo)
+    await reference.ensure_loaded()
+    sent = []
+
+    async def send(chat_id, text):
+        sent.append(chat_id)
+
+    now = datetime.now(handlers.moscow_tz)
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "REFERENCE", reference):
+        counts = await asyncio.gather(*(send_digest(send, now, rate=1000) for _ in range(3)))
+        assert sorted(counts) == [0, 0, 10] and len(sent) == 10
+        assert await send_digest(send, now + timedelta(days=1), rate=1000) == 10
+
+    assert fake.tables["digest_runs"][0]["sent_on"] == (now + timedelta(days=1)).date().isoformat()
+
+
+@pytest.mark.asyncio
+async def test_no_subscribers_no_work():
+    repo = AsyncMock()
+    repo.digest_subscribers.return_value = []
+    with patch.object(handlers, "REPO", repo):
+        assert await send_digest(AsyncMock(), datetime.now(handlers.moscow_tz)) == 0
+    repo.week_schedule.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_toggle_digest():
+    fake, repo = backend(0)
+    message = MagicMock()
+    message.from_user.id = 1003
+    message.from_user.username = "student3"
+    message.answer = AsyncMock()
+
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "PROFILES", LRUCache(maxsize=10)), \
+            patch.object(handlers, "config") as config:
+        config.digest_time = "07:30"
+        await handlers.toggle_digest(message)
+        assert fake.tables["users"][3]["digest"] is True
+        assert "07:30" in message.answer.await_args.args[0]
+        await handlers.toggle_digest(message)
+        assert fake.tables["users"][3]["digest"] is False
+        assert message.answer.await_args.args[0] == "Ежедневная сводка отключена."
+
+
+@pytest.mark.asyncio
+async def test_digest_is_scheduled_daily():
+    scheduler = start_digest(AsyncMock(), "07:30")
+    try:
+        job, = scheduler.get_jobs()
+        next_run = job.next_run_time
+        assert (next_run.hour, next_run.minute) == (7, 30)
+        assert next_run.utcoffset().total_seconds() == 3 * 3600
+    finally:
+        scheduler.shutdown(wait=False)
@@ -13,13 +13,15 @@ import pytz
 import random
 import string
 
+from Bot.cache import LRUCache
+from Bot.reference import ReferenceData
+from Bot.repository import Repository
+from tests.fake_supabase import FakeSupabase, seed_tables
 
-with patch('Bot.handlers.config') as mock_config, \
-        patch('Bot.handlers.sb') as mock_sb:
+
+with patch('Bot.handlers.config') as mock_config:
     mock_config.url.get_secret_value.return_value = "mock_url"
     mock_config.key.get_secret_value.return_value = "mock_key"
-    mock_client = AsyncMock()
-    mock_sb.create_client.return_value = mock_client
     from Bot.handlers import (
         command_start_handler,
         registration,
@@ -50,13 +52,18 @@ with patch('Bot.handlers.config') as mock_config, \
 
 @pytest.fixture(autouse=True)
 def auto_mock_config_and_db():
+    tables = seed_tables()
+    # пользователь добавлен заранее только по username, как в registration_1
+    tables["users"].append({"id": 100, "tg_id": None, "name": "Somebody", "tg_username": "Somebody"})
+    fake = FakeSupabase(tables)
+    repo = Repository(fake)
     with patch('Bot.handlers.config') as mock_config, \
-            patch('Bot.handlers.sb') as mock_sb:
+            patch('Bot.handlers.REPO', repo), \
+            patch('Bot.handlers.REFERENCE', ReferenceData(repo)), \
+            patch('Bot.handlers.PROFILES', LRUCache(maxsize=100)):
         mock_config.url.get_secret_value.return_value = "mock_url"
         mock_config.key.get_secret_value.return_value = "mock_key"
-        mock_client = AsyncMock()
-        mock_sb.create_client.return_value = mock_client
-        yield mock_config, mock_client
+        yield mock_config, fake
 
 
 @pytest.fixture
@@ -158,7 +165,7 @@ async def test_registration_2():
 
 @pytest.mark.asyncio
 async def test_fix_registration_command():
-    """Пользователь с обычными параметрами удаляется из БД и бот просит ввести фио"""
+    """Бот просит ввести фио заново, старая запись не удаляется и заменяется после ввода нового фио"""
 
     mock_callback = callback()
     mock_state = AsyncMock(spec=FSMContext)
@@ -235,7 +242,7 @@ async def test_deadline_entered_command_1():
     """Положительный тест-кейс ввода данных от пользователя о дедлайне домашнего задания
     Ожидаемый результат - успешное добавление ДЗ и изменение состояния машины на зарегистрированного пользователя"""
 
-    msg = message(text='12.12.2025')
+    msg = message(text=(datetime.now() + timedelta(days=30)).strftime('%d.%m.%Y'))
     mock_state = AsyncMock(spec=FSMContext)
 
     await deadline_entered(msg, mock_state)
@@ -342,3 +349,68 @@ async def test_input_time_command():
     msg.answer.assert_called_once()
     args, kwargs = msg.answer.call_args
     assert 'Неверный формат. Введите время как HH:MM' == args[0]
+
+
+@pytest.mark.asyncio
+async def test_homework_page_navigation():
+    """Первая страница ДЗ: есть кнопка «вперёд» с курсором последней строки и переключатель архива"""
+
+    from Bot import handlers
+    repo = AsyncMock()
+    repo.homework_page.return_value = ([{'id': 1, 'description': 'Задача 1', 'due_date': '2030-01-10'},
+                                        {'id': 2, 'description': 'Задача 2', 'due_date': '2030-01-11'}], True)
+    with patch.object(handlers, 'REPO', repo), patch.object(handlers.REFERENCE, 'loaded', True), \
+            patch.dict(handlers.REFERENCE.subjects, {3: 'Матан'}):
+        text, keyboard = await handlers.homework_page(3)
+
+    assert 'Домашние задания по предмету Матан' in text
+    assert text.index('Задача 1') < text.index('Задача 2')
+    buttons = [button for row in keyboard.inline_keyboard for button in row]
+    assert [button.text for button in buttons] == ['▶', 'Архив']
+    assert handlers.HomeworkPage.unpack(buttons[0].callback_data) == handlers.HomeworkPage(
+        subject_id=3, due='2030-01-11', id=2)
+    assert repo.homework_page.await_args.args[4:] == (None, False)
+
+
+@pytest.mark.asyncio
+async def test_homework_page_back():
+    """Страница, открытая кнопкой «назад», показывает «вперёд» и «назад», если есть ещё строки"""
+
+    from Bot import handlers
+    repo = AsyncMock()
+    repo.homework_page.return_value = ([{'id': 5, 'description': 'Задача 5', 'due_date': '2030-01-10'}], True)
+    with patch.object(handlers, 'REPO', repo), patch.object(handlers.REFERENCE, 'loaded', True):
+        text, keyboard = await handlers.homework_page(3, archive=True, cursor=('2030-01-11', 6), back=True)
+
+    assert [button.text for row in keyboard.inline_keyboard for button in row] == ['◀', '▶', 'Актуальные']
+
+
+@pytest.mark.asyncio
+async def test_deadlines_page():
+    """Вторая страница дедлайнов: нумерация продолжается, есть кнопки «назад» и «вперёд»"""
+
+    from Bot import handlers
+    repo = AsyncMock()
+    repo.user_deadlines.return_value = ([{'title': 'Курсовая', 'deadline_at': '2030-01-10T12:00:00+00:00'}], True)
+    size = 10
+    with patch.object(handlers, 'REPO', repo), patch.object(handlers, 'config') as config:
+        config.deadlines_page_size = size
+        text, keyboard = await handlers.deadlines_page(111, page=1)
+
+    assert f"{size + 1}. <b>Курсовая</b>" in text
+    assert "10.01.2030 15:00" in text  # время по Москве, а не UTC
+    assert repo.user_deadlines.await_args.args[2:] == (size, size)
+    buttons = [button for row in keyboard.inline_keyboard for button in row]
+    assert [handlers.DeadlinesPage.unpack(button.callback_data).page for button in buttons] == [0, 2]
+
+
+@pytest.mark.asyncio
+async def test_deadlines_page_empty():
+    from Bot import handlers
+    repo = AsyncMock()
+    repo.user_deadlines.return_value = ([], False)
+    with patch.object(handlers, 'REPO', repo):
+        text, keyboard = await handlers.deadlines_page(111)
+
+    assert text == 'У вас пока нет активных дедлайнов!'
+    assert keyboard is None
@@ -0,0 +1,84 @@
+"""Tests for per-user translations."""
+
+import asyncio
+import gettext
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from Bot import handlers, i18n
+from Bot.storage import SQLiteStorage
+
+
+class English(gettext.NullTranslations):
+    """Catalog with a single translated message."""
+
+    def gettext(self, message):
+        return {"Отлично!": "Great!"}.get(message, message)
+
+
+@pytest.fixture(autouse=True)
+def catalogs():
+    with patch.dict(i18n.CATALOGS, {"en_US": English()}):
+        yield
+
+
+def test_catalogs_are_loaded_once():
+    assert "en_US" in i18n.load_catalogs()
+    assert i18n.gettext("Отлично!") == "Отлично!"
+
+
+@pytest.mark.asyncio
+async def test_no_language_bleed_between_users():
+    """Одновременные обновления разных пользователей получают каждое свой язык"""
+
+    locales = i18n.LocaleStore(MemoryStorage())
+    await locales.set(1, "en_US")
+    await locales.set(2, "ru_RU")
+    middleware = i18n.LocaleMiddleware(locales)
+
+    async def handler(event, data):
+        await asyncio.sleep(0.01)
+        return i18n.gettext("Отлично!"), i18n.current_locale()
+
+    results = await asyncio.gather(*(middleware(handler, None, {"event_from_user": SimpleNamespace(id=user_id)})
+                                     for user_id in (1, 2, 1, 3)))
+
+    assert results == [("Great!", "en_US"), ("Отлично!", "ru_RU"), ("Great!", "en_US"), ("Отлично!", "ru_RU")]
+    assert i18n.current_locale() == i18n.DEFAULT_LOCALE
+
+
+def test_unknown_locale_falls_back_to_default():
+    token = i18n.use_locale("fr_FR")
+    assert i18n.current_locale() == i18n.DEFAULT_LOCALE
+    i18n._locale.reset(token)
+
+
+@pytest.mark.asyncio
+async def test_locale_is_shared_and_survives_state_clear(tmp_path):
+    """Выбранный язык виден другому процессу и не сбрасывается при очистке состояния диалога"""
+
+    path = tmp_path / "fsm.sqlite3"
+    storage = SQLiteStorage(path)
+    state = FSMContext(storage, StorageKey(bot_id=42, chat_id=7, user_id=7))
+    callback = MagicMock()
+    callback.data = "lang-en_US"
+    callback.from_user.id = 7
+    callback.message.answer = AsyncMock()
+
+    await handlers.start_registration(callback, state)
+    await state.clear()
+
+    other_process = i18n.LocaleStore(SQLiteStorage(path))
+    assert await other_process.get(7) == "en_US"
+    assert await other_process.many([7, 8]) == {7: "en_US", 8: i18n.DEFAULT_LOCALE}
+    middleware = i18n.LocaleMiddleware()
+
+    async def handler(event, data):
+        return i18n.current_locale()
+
+    data = {"event_from_user": SimpleNamespace(id=7), "fsm_storage": SQLiteStorage(path)}
+    assert await middleware(handler, None, data) == "en_US"
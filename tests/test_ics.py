@@ -0,0 +1,99 @@
+"""Tests for iCalendar export."""
+
+import pytest
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from Bot import handlers
+from Bot.ics import ScheduleCalendar, escape, fold
+from Bot.repository import Repository
+from Bot.semester import week_number, week_parity
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+START = date(2026, 9, 1)  # вторник
+
+
+async def content(document):
+    return b"".join([chunk async for chunk in document.read(None)])
+
+
+def events(data):
+    text = data.decode().replace("\r\n ", "")
+    return [block.split("END:VEVENT")[0] for block in text.split("BEGIN:VEVENT")[1:]]
+
+
+def test_semester_weeks():
+    assert week_number(date(2026, 8, 31), START) == 1
+    assert week_number(date(2026, 9, 6), START) == 1
+    assert week_number(date(2026, 9, 7), START) == 2
+    assert week_parity(date(2026, 9, 1), START) == "odd"
+    assert week_parity(date(2026, 9, 8), START) == "even"
+
+
+def test_fold_and_escape():
+    line = "SUMMARY:" + "Математический анализ, семинар; " * 4
+    folded = fold(line)
+    assert all(len(part) <= 75 for part in folded.split(b"\r\n"))
+    assert folded.replace(b"\r\n ", b"").decode() == line + "\r\n"
+    assert escape("a,b;c\\d\ne") == "a\\,b\\;c\\\\d\\ne"
+
+
+@pytest.mark.asyncio
+async def test_calendar_with_parity_and_deadlines():
+    fake = FakeSupabase(seed_tables())
+    repo = Repository(fake)
+    calendar = ScheduleCalendar(repo)
+    await calendar.ensure_built(START, 18)
+    deadlines = await repo.deadlines_between([1001], "2000-01-01T00:00:00+00:00", "2100-01-01T00:00:00+00:00")
+
+    data = await content(calendar.file(deadlines, "Расписание", "Дедлайн: {title}"))
+
+    assert data.startswith(b"BEGIN:VCALENDAR\r\n") and data.endswith(b"END:VCALENDAR\r\n")
+    found = events(data)
+    assert len(found) == len(fake.tables["schedule"]) + len(deadlines) == 20 + 40
+    monday_odd = next(e for e in found if "UID:pair-12@" in e)  # понедельник, 2 пара, нечётные недели
+    assert "DTSTART;TZID=Europe/Moscow:20260914T110000" in monday_odd  # 31 августа раньше начала семестра
+    assert "RRULE:FREQ=WEEKLY;INTERVAL=2;UNTIL=20270103T235959Z" in monday_odd
+    tuesday_even = next(e for e in found if "UID:pair-21@" in e)
+    assert "DTSTART;TZID=Europe/Moscow:20260908T090000" in tuesday_even
+    tuesday_every = next(e for e in found if "UID:pair-23@" in e)
+    assert "DTSTART;TZID=Europe/Moscow:20260901T130000" in tuesday_every and "INTERVAL=1;" in tuesday_every
+    assert "SUMMARY:Дедлайн: Дедлайн 1\r\n" in next(e for e in found if "UID:deadline-1@" in e)
+
+
+@pytest.mark.asyncio
+async def test_schedule_part_is_cached_and_streamed():
+    fake = FakeSupabase(seed_tables())
+    calendar = ScheduleCalendar(Repository(fake))
+    await calendar.ensure_built(START, 18)
+    await calendar.ensure_built(START, 18)
+    assert fake.queries == ["schedule_full"]
+
+    document = calendar.file([], "Расписание")
+    document.chunk_size = 1024
+    chunks = [chunk async for chunk in document.read(None)]
+    assert len(chunks) > 3 and all(len(chunk) < 2048 for chunk in chunks)
+
+    calendar.invalidate()
+    await calendar.ensure_built(START, 18)
+    await calendar.ensure_built(date(2027, 2, 9), 18)
+    assert fake.queries == ["schedule_full"] * 3
+
+
+@pytest.mark.asyncio
+async def test_export_command():
+    fake = FakeSupabase(seed_tables())
+    repo = Repository(fake)
+    message = MagicMock()
+    message.from_user.id = 1002
+    message.answer_document = AsyncMock()
+
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "CALENDAR", ScheduleCalendar(repo)), \
+            patch.object(handlers, "config") as config:
+        config.semester_start, config.semester_weeks = START, 18
+        await handlers.export_calendar(message)
+
+    document = message.answer_document.await_args.args[0]
+    assert document.filename == "schedule.ics"
+    assert len(events(await content(document))) == 20 + 40
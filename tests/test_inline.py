@@ -0,0 +1,81 @@
+"""Tests for inline schedule lookup."""
+
+import time
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from Bot import handlers
+from Bot.inline import ScheduleIndex
+from Bot.repository import Repository
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+@pytest.fixture
+def backend():
+    fake = FakeSupabase(seed_tables())
+    return fake, ScheduleIndex(Repository(fake), handlers.format_schedule)
+
+
+def days(results):
+    return [result.title for result in results]
+
+
+@pytest.mark.asyncio
+async def test_index_is_built_with_one_query(backend):
+    fake, index = backend
+    await index.ensure_built()
+    await index.ensure_built()
+
+    assert fake.queries == ["schedule_full"]
+    monday, = index.lookup("пн", "ru_RU", 3)
+    assert monday.title == "Понедельник"
+    assert monday.input_message_content.message_text == handlers.format_schedule(
+        await Repository(fake).day_schedule(1), "понедельник")
+    assert "нет пар" in index.lookup("сб", "ru_RU", 3)[0].input_message_content.message_text
+
+
+@pytest.mark.asyncio
+async def test_lookup_words(backend):
+    _, index = backend
+    await index.ensure_built()
+
+    assert days(index.lookup("", "ru_RU", 5)) == ["Пятница", "Суббота"]
+    assert days(index.lookup("завтра", "ru_RU", 7)) == ["Понедельник"]
+    assert days(index.lookup("Tomorrow ", "en_US", 2)) == days(index.lookup("wed", "en_US", 2))
+    assert days(index.lookup("с", "ru_RU", 1)) == ["Понедельник", "Среда", "Суббота"]
+    assert index.lookup("xyz", "ru_RU", 1) == []
+    assert index.lookup("пн", "de_DE", 1) == index.lookup("пн", "ru_RU", 1)
+
+
+@pytest.mark.asyncio
+async def test_lookup_is_fast(backend):
+    """Ответ на inline-запрос не обращается к БД и занимает доли миллисекунды"""
+
+    fake, index = backend
+    await index.ensure_built()
+    start = time.perf_counter()
+    for query in ["п", "пн", "пят", "сегодня", "tomorrow", ""] * 100:
+        index.lookup(query, "ru_RU", 3)
+    assert (time.perf_counter() - start) / 600 < 0.001
+    assert len(fake.queries) == 1
+
+
+@pytest.mark.asyncio
+async def test_inline_handler_and_invalidation(backend):
+    fake, index = backend
+    inline_query = MagicMock()
+    inline_query.query = "чт"
+    inline_query.answer = AsyncMock()
+
+    with patch.object(handlers, "INLINE_INDEX", index), patch.object(handlers, "config") as config:
+        config.inline_cache_time = 300
+        await handlers.inline_schedule(inline_query)
+        await handlers.inline_schedule(inline_query)
+        handlers.schedule_changed()
+        await handlers.inline_schedule(inline_query)
+
+    results = inline_query.answer.await_args.args[0]
+    assert days(results) == ["Четверг"]
+    assert inline_query.answer.await_args.kwargs == {"cache_time": 300, "is_personal": True}
+    assert fake.queries == ["schedule_full", "schedule_full"]
+    assert results[0].id.startswith("2-")
@@ -0,0 +1,65 @@
+"""Tests for the update recorder and the load generator."""
+
+import json
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from Bot.recorder import UpdateRecorder
+from tests.load_replay import synthesize, run_load, read_records, write_records, main
+
+
+def test_synthesize_scenario():
+    records = synthesize("schedule", users=20, window=10)
+
+    assert len(records) == 40
+    assert [r["update"]["update_id"] for r in records] == list(range(1, 41))
+    assert all(0 <= r["t"] <= 10 for r in records)
+    assert [r["t"] for r in records] == sorted(r["t"] for r in records)
+    for user_id in range(1000, 1020):
+        steps = [r for r in records if user_id in (r["update"].get("message") or r["update"]["callback_query"])["from"].values()]
+        assert "message" in steps[0]["update"] and steps[1]["update"]["callback_query"]["data"] == "monday"
+
+
+@pytest.mark.asyncio
+async def test_replay_through_handlers():
+    records = synthesize("schedule", users=30, window=1)
+
+    report = await run_load(records, rate=500, db_latency=0)
+    again = await run_load(records, db_latency=0)
+
+    for result in (report, again):
+        assert result["updates"] == 60 and result["errors"] == 0
+        assert result["api_calls"] == 90  # клавиатура на /schedule, ответ на нажатие и расписание
+        assert 1 <= result["db_queries"] <= 2  # одновременные промахи кэша ждут один запрос
+        assert result["p50_ms"] <= result["p99_ms"]
+        assert result["peak_rss_mb"] > 0
+    assert report["wall_s"] >= 59 / 500
+
+
+@pytest.mark.asyncio
+async def test_recorded_updates_replay(tmp_path):
+    path = tmp_path / "updates.jsonl"
+    recorder = UpdateRecorder(path)
+    dp = Dispatcher()
+    dp.update.outer_middleware(recorder)
+    for record in synthesize("deadlines", users=3, window=1):
+        await dp.feed_update(Bot("42:TEST"), Update.model_validate(record["update"]))
+    recorder.close()
+
+    records = read_records(path)
+    assert len(records) == 6
+    assert records[0]["update"]["message"]["text"] == "/deadlines"
+    report = await run_load(records, speed=100, db_latency=0)
+    assert report["errors"] == 0 and report["db_queries"] == 3
+
+
+def test_cli_report(tmp_path):
+    updates, out = tmp_path / "updates.jsonl", tmp_path / "load.json"
+    main(["--scenario", "schedule", "--users", "5", "--synthesize", str(updates)])
+    write_records(updates, read_records(updates)[:4])
+    main(["--file", str(updates), "--db-latency", "0", "--tracemalloc", "--out", str(out)])
+
+    report = json.loads(out.read_text())
+    assert report["updates"] == 4
+    assert {"throughput_per_s", "p50_ms", "p99_ms", "peak_rss_mb", "peak_traced_mb"} <= set(report)
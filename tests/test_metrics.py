@@ -0,0 +1,125 @@
+"""Tests for metrics."""
+
+import socket
+import pytest
+from aiohttp import ClientSession
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.types import Message, Update
+
+from Bot import metrics
+from Bot.repository import Repository
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+def update(text, update_id=1):
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": 1,
+            "date": 1750000000,
+            "chat": {"id": 123, "type": "private", "first_name": "Mario"},
+            "from": {"id": 123, "is_bot": False, "first_name": "Mario", "username": "mario"},
+            "text": text,
+        },
+    })
+
+
+def make_dispatcher(repo):
+    router = Router()
+
+    @router.message(F.text == "/subjects")
+    async def list_subjects(message: Message):
+        await repo.subjects()
+        await repo.classrooms()
+
+    @router.message(F.text == "/fail")
+    async def failing(message: Message):
+        raise RuntimeError("boom")
+
+    dp = Dispatcher()
+    metrics.setup_metrics(dp)
+    dp.include_router(router)
+    return dp
+
+
+def count(histogram, *labels):
+    return histogram.values.get(labels, (None, 0, 0))[2]
+
+
+def total(histogram, *labels):
+    return histogram.values.get(labels, (None, 0, 0))[1]
+
+
+@pytest.mark.asyncio
+async def test_update_db_queries_by_handler():
+    repo = Repository(FakeSupabase(seed_tables()))
+    dp = make_dispatcher(repo)
+    before_count = count(metrics.UPDATE_DB_QUERIES, "list_subjects")
+    before_queries = total(metrics.UPDATE_DB_QUERIES, "list_subjects")
+
+    await dp.feed_update(Bot("42:TEST"), update("/subjects"))
+
+    assert count(metrics.UPDATE_DB_QUERIES, "list_subjects") == before_count + 1
+    assert total(metrics.UPDATE_DB_QUERIES, "list_subjects") == before_queries + 2
+    assert count(metrics.UPDATE_SECONDS, "list_subjects") >= 1
+    repo.close()
+
+
+@pytest.mark.asyncio
+async def test_errors_and_unhandled_updates():
+    dp = make_dispatcher(Repository(FakeSupabase(seed_tables())))
+    errors = metrics.UPDATE_ERRORS.values.get(("failing",), 0)
+    unhandled = count(metrics.UPDATE_SECONDS, "unhandled")
+
+    with pytest.raises(RuntimeError):
+        await dp.feed_update(Bot("42:TEST"), update("/fail"))
+    await dp.feed_update(Bot("42:TEST"), update("hello"))
+
+    assert metrics.UPDATE_ERRORS.values[("failing",)] == errors + 1
+    assert count(metrics.UPDATE_SECONDS, "unhandled") == unhandled + 1
+
+
+@pytest.mark.asyncio
+async def test_queries_outside_updates_are_not_attributed():
+    repo = Repository(FakeSupabase(seed_tables()))
+    queries = count(metrics.DB_QUERY_SECONDS)
+    updates = sum(c for _, _, c in metrics.UPDATE_DB_QUERIES.values.values())
+
+    await repo.subjects()
+
+    assert count(metrics.DB_QUERY_SECONDS) == queries + 1
+    assert sum(c for _, _, c in metrics.UPDATE_DB_QUERIES.values.values()) == updates
+    repo.close()
+
+
+def test_render_prometheus_text():
+    histogram = metrics.Histogram("test_seconds", "Test histogram.", ("handler",), buckets=(0.1, 1))
+    counter = metrics.Counter("test_total", "Test counter.", fn=lambda: 7)
+    try:
+        histogram.observe(0.5, "start")
+        text = metrics.render()
+    finally:
+        metrics.REGISTRY.remove(histogram)
+        metrics.REGISTRY.remove(counter)
+
+    assert "# TYPE test_seconds histogram" in text
+    assert 'test_seconds_bucket{handler="start",le="0.1"} 0' in text
+    assert 'test_seconds_bucket{handler="start",le="1"} 1' in text
+    assert 'test_seconds_bucket{handler="start",le="+Inf"} 1' in text
+    assert 'test_seconds_count{handler="start"} 1' in text
+    assert "test_total 7" in text
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    runner = await metrics.start_metrics_server("127.0.0.1", port)
+    try:
+        async with ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.status == 200
+                assert "# TYPE bot_update_seconds histogram" in await response.text()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,77 @@
+"""Tests for reference tables mirror."""
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from Bot.reference import ReferenceData
+
+
+def repo(subjects):
+    mock = AsyncMock()
+    mock.subjects.return_value = subjects
+    mock.classrooms.return_value = [{"id": 1, "number": "П-8"}]
+    mock.teachers.return_value = [{"id": 1, "name": "Иванов"}]
+    mock.time_slots.return_value = [{"pair_number": 1, "start_time": "09:00:00", "end_time": "10:35:00"}]
+    mock.week_schedule.return_value = [{"id": 1, "day_of_week": 1, "pair_number": 1, "subject": "Матан"}]
+    return mock
+
+
+@pytest.mark.asyncio
+async def test_lookup_and_keyboards():
+    """После загрузки название предмета и клавиатуры берутся из памяти"""
+
+    mock_repo = repo([{"id": 1, "name": "Матан"}, {"id": 2, "name": "Физика"}, {"id": 3, "name": "Английский"}])
+    reference = ReferenceData(mock_repo)
+    await reference.ensure_loaded()
+    await reference.ensure_loaded()
+
+    assert mock_repo.subjects.await_count == 1
+    assert reference.subject_name("2") == "Физика"
+    assert reference.subject_name(42) is None
+
+    keyboard = reference.subject_keyboard("subject_").inline_keyboard
+    assert [[b.callback_data for b in row] for row in keyboard] == [["subject_1", "subject_2"], ["subject_3"]]
+    keyboard = reference.subject_keyboard("view_subject_").inline_keyboard
+    assert [b.callback_data for row in keyboard for b in row] == ["view_subject_1", "view_subject_2", "view_subject_3"]
+
+
+@pytest.mark.asyncio
+async def test_refresh_applies_only_changes():
+    """Клавиатуры пересобираются и вызывается on_change, только если данные изменились"""
+
+    mock_repo = repo([{"id": 1, "name": "Матан"}])
+    on_change = MagicMock()
+    reference = ReferenceData(mock_repo, on_change=on_change)
+    await reference.refresh()
+    keyboard = reference.subject_keyboard("subject_")
+
+    assert not await reference.refresh()
+    assert reference.subject_keyboard("subject_") is keyboard
+    on_change.assert_not_called()
+
+    mock_repo.subjects.return_value = [{"id": 1, "name": "Матанализ"}]
+    assert await reference.refresh()
+    assert reference.subject_name(1) == "Матанализ"
+    on_change.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_no_subjects():
+    reference = ReferenceData(repo([]))
+    await reference.ensure_loaded()
+    assert reference.subject_keyboard("subject_") is None
+
+
+@pytest.mark.asyncio
+async def test_moved_pair_invalidates_schedule():
+    """Перенос пары в таблице schedule тоже сбрасывает готовые расписания"""
+
+    mock_repo = repo([{"id": 1, "name": "Матан"}])
+    on_change = MagicMock()
+    reference = ReferenceData(mock_repo, on_change=on_change)
+    await reference.refresh()
+
+    mock_repo.week_schedule.return_value = [{"id": 1, "day_of_week": 2, "pair_number": 1, "subject": "Матан"}]
+    assert await reference.refresh()
+    on_change.assert_called_once()
+    assert reference.subject_keyboard("subject_") is not None
@@ -0,0 +1,230 @@
+"""Tests for deadline reminders scheduler."""
+
+import asyncio
+import time
+import pytest
+import pytz
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock
+
+from Bot.reminders import ReminderScheduler, parse_time, reminder_entries
+from Bot.repository import Repository
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+def reminder(id, seconds, telegram_id=1):
+    at = datetime.now(pytz.UTC) + timedelta(seconds=seconds)
+    return {"id": id, "deadline_id": id, "telegram_id": telegram_id, "title": f"Дедлайн {id}",
+            "deadline_at": (at + timedelta(minutes=15)).isoformat(), "fire_at": at.isoformat()}
+
+
+def free_repo():
+    """Repository mock where every claimed entry is free."""
+    repo = AsyncMock()
+    repo.claim_reminders.side_effect = lambda ids, *args: ids
+    return repo
+
+
+def test_parse_time():
+    assert parse_time("2025-06-01T12:00:00+03:00") == datetime(2025, 6, 1, 9, tzinfo=pytz.UTC)
+    assert parse_time("2025-06-01T12:00:00") == datetime(2025, 6, 1, 12, tzinfo=pytz.UTC)
+
+
+@pytest.mark.asyncio
+async def test_reminder_fires_on_time():
+    """Напоминание приходит в момент срабатывания, а не на следующем опросе"""
+
+    repo = free_repo()
+    repo.reminders_due.return_value = [reminder(1, 0.3)]
+    sent = {}
+
+    async def send(telegram_id, rows):
+        for row in rows:
+            sent[row["id"]] = datetime.now(pytz.UTC)
+
+    scheduler = ReminderScheduler(repo)
+    started = datetime.now(pytz.UTC)
+    task = asyncio.create_task(scheduler.run(send))
+    await asyncio.sleep(0.6)
+    task.cancel()
+
+    assert 0.2 <= (sent[1] - started).total_seconds() < 0.5
+    repo.mark_reminders_sent.assert_awaited_once_with([1])
+    repo.reminders_due.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_new_deadline_wakes_scheduler():
+    """Напоминание, добавленное после загрузки, подхватывается без обращения к БД"""
+
+    repo = free_repo()
+    repo.reminders_due.return_value = []
+    send = AsyncMock()
+
+    scheduler = ReminderScheduler(repo)
+    task = asyncio.create_task(scheduler.run(send))
+    await asyncio.sleep(0.05)
+    scheduler.add(reminder(2, 0.1))
+    await asyncio.sleep(0.3)
+    task.cancel()
+
+    send.assert_awaited_once()
+    repo.reminders_due.assert_awaited_once()
+
+
+def test_reminder_entries():
+    """Для каждого смещения создаётся своя запись, прошедшие пропускаются"""
+
+    now = datetime(2025, 6, 1, 12, tzinfo=pytz.UTC)
+    deadline = {"id": 5, "deadline_at": "2025-06-02T10:00:00+00:00"}
+    entries = reminder_entries(deadline, [15, 1440, 180], now)
+    assert entries == [{"deadline_id": 5, "fire_at": "2025-06-02T07:00:00+00:00"},
+                       {"deadline_id": 5, "fire_at": "2025-06-02T09:45:00+00:00"}]
+
+
+def test_reminder_beyond_horizon_is_not_kept():
+    scheduler = ReminderScheduler(AsyncMock(), horizon=timedelta(minutes=10))
+    scheduler._horizon_end = datetime.now(pytz.UTC) + scheduler.horizon
+    scheduler.add(reminder(3, 3600))
+    scheduler.add(reminder(4, 60))
+    scheduler.add(reminder(4, 60))
+    assert [row["id"] for row in scheduler.pop_due(datetime.now(pytz.UTC) + timedelta(hours=2))] == [4]
+
+
+class FakeBot:
+    """Bot that spends some time on every message."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.messages = []
+
+    async def send_message(self, chat_id, text):
+        await asyncio.sleep(self.delay)
+        self.messages.append((chat_id, text))
+
+
+async def deliver(count, concurrency=100):
+    bot = FakeBot()
+    repo = AsyncMock()
+
+    async def send(telegram_id, rows):
+        await bot.send_message(telegram_id, "\n\n".join(row["title"] for row in rows))
+
+    scheduler = ReminderScheduler(repo, concurrency=concurrency)
+    rows = [reminder(i, 30, telegram_id=i) for i in range(count)]
+    start = time.perf_counter()
+    delivered = await scheduler.deliver(rows, send)
+    return time.perf_counter() - start, bot, repo, delivered
+
+
+@pytest.mark.asyncio
+async def test_delivery_time_is_flat():
+    """Время доставки почти не растёт с числом напоминаний"""
+
+    small, *_ = await deliver(5)
+    large, bot, repo, delivered = await deliver(100)
+
+    assert len(bot.messages) == 100
+    assert large < 5 * small  # по очереди было бы в 20 раз дольше
+    repo.mark_reminders_sent.assert_awaited_once()
+    assert sorted(repo.mark_reminders_sent.await_args.args[0]) == list(range(100))
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit():
+    elapsed, *_ = await deliver(10, concurrency=5)
+    assert elapsed >= 0.1
+
+
+@pytest.mark.asyncio
+async def test_reminders_for_same_user_are_merged():
+    bot = FakeBot(delay=0)
+    repo = AsyncMock()
+
+    async def send(telegram_id, rows):
+        await bot.send_message(telegram_id, "\n\n".join(row["title"] for row in rows))
+
+    rows = [reminder(1, 30, telegram_id=7), reminder(2, 30, telegram_id=7), reminder(3, 30, telegram_id=8)]
+    await ReminderScheduler(repo).deliver(rows, send)
+
+    assert sorted(bot.messages) == [(7, "Дедлайн 1\n\nДедлайн 2"), (8, "Дедлайн 3")]
+
+
+@pytest.mark.asyncio
+async def test_failed_delivery_is_not_marked():
+    repo = AsyncMock()
+
+    async def send(telegram_id, rows):
+        if telegram_id == 8:
+            raise RuntimeError("blocked")
+
+    rows = [reminder(1, 30, telegram_id=7), reminder(2, 30, telegram_id=8)]
+    assert await ReminderScheduler(repo).deliver(rows, send) == [1]
+    repo.mark_reminders_sent.assert_awaited_once_with([1])
+
+
+def queue(count, seconds_ago=1):
+    """Tables with count due reminder queue entries of different users."""
+    tables = seed_tables(deadlines=count, due_reminders=0)
+    at = (datetime.now(pytz.UTC) - timedelta(seconds=seconds_ago)).isoformat()
+    tables["reminder_queue"] = [{"id": i, "deadline_id": i, "sent": False, "fire_at": at} for i in range(count)]
+    return tables
+
+
+async def tick(scheduler, send):
+    now = datetime.now(pytz.UTC)
+    await scheduler.load(now)
+    return await scheduler.deliver(await scheduler.claim(scheduler.pop_due(now), now), send)
+
+
+@pytest.mark.asyncio
+async def test_workers_split_queue_without_duplicates():
+    """Два воркера с общей очередью отправляют каждое напоминание ровно один раз"""
+
+    fake = FakeSupabase(queue(40), latency=0.01)
+    sent = []
+
+    async def send(telegram_id, rows):
+        await asyncio.sleep(0.01)
+        sent.extend(row["id"] for row in rows)
+
+    workers = [ReminderScheduler(Repository(fake), worker=name) for name in ("a", "b")]
+    first = await tick(workers[0], send)
+    second, third = await asyncio.gather(tick(workers[1], send), tick(workers[0], send))
+
+    assert sorted(sent) == list(range(40))
+    assert sorted(first + second + third) == list(range(40))
+    assert all(row["sent"] and row["locked_by"] == "a" for row in fake.tables["reminder_queue"] if row["id"] in first)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_claims_do_not_overlap():
+    fake = FakeSupabase(queue(30), latency=0.005)
+    repos = [Repository(fake) for _ in range(3)]
+    now = datetime.now(pytz.UTC)
+    claims = await asyncio.gather(*(repo.claim_reminders(list(range(30)), f"w{i}", now.isoformat(),
+                                                         (now + timedelta(minutes=5)).isoformat())
+                                    for i, repo in enumerate(repos)))
+
+    assert sorted(sum(claims, [])) == list(range(30))
+    assert len([claim for claim in claims if claim]) == 1
+
+
+@pytest.mark.asyncio
+async def test_lease_of_crashed_worker_is_reclaimed():
+    """Записи упавшего воркера забирает другой, когда истекает аренда"""
+
+    fake = FakeSupabase(queue(3), latency=0)
+    crashed = ReminderScheduler(Repository(fake), worker="crashed", lease=timedelta(seconds=0.2))
+    now = datetime.now(pytz.UTC)
+    await crashed.load(now)
+    assert len(await crashed.claim(crashed.pop_due(now), now)) == 3  # занял и упал, не отправив
+
+    send = AsyncMock()
+    alive = ReminderScheduler(Repository(fake), worker="alive", lease=timedelta(seconds=0.2))
+    assert await tick(alive, send) == []
+    await asyncio.sleep(1.3)
+    later = datetime.now(pytz.UTC)
+    assert sorted(await alive.deliver(await alive.claim(alive.pop_due(later), later), send)) == [0, 1, 2]
+    assert all(row["sent"] and row["locked_by"] == "alive" for row in fake.tables["reminder_queue"])
+    assert alive.pop_due(later + timedelta(hours=1)) == []
@@ -0,0 +1,187 @@
+"""Tests for non-blocking data access."""
+
+import asyncio
+import time
+import pytest
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from Bot.repository import Repository
+from Bot.cache import LRUCache
+from Bot import handlers, metrics
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+DELAY = 0.2
+
+
+class SlowQuery:
+    """Query of the synchronous client that blocks the calling thread."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(DELAY)
+        return SimpleNamespace(data=self.data)
+
+
+class SlowClient:
+    """Client that answers every table with the same rows after a delay."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def table(self, name):
+        return SlowQuery(self.data)
+
+
+def callback(user_id):
+    mock_callback = MagicMock()
+    mock_callback.from_user.id = user_id
+    mock_callback.from_user.username = f"user{user_id}"
+    mock_callback.message.answer = AsyncMock()
+    return mock_callback
+
+
+@pytest.mark.asyncio
+async def test_queries_do_not_block_event_loop():
+    """Пока выполняется запрос, цикл событий продолжает работать"""
+
+    repo = Repository(SlowClient([{"id": 1, "name": "Матан"}]))
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    assert await repo.subjects() == [{"id": 1, "name": "Матан"}]
+    task.cancel()
+    repo.close()
+    assert ticks > 5
+
+
+@pytest.mark.asyncio
+async def test_concurrent_updates_overlap():
+    """Несколько одновременных нажатий обрабатываются параллельно, а не по очереди"""
+
+    repo = Repository(SlowClient([{"tg_id": str(i), "name": "Марио"} for i in range(4)]), max_workers=4)
+    callbacks = [callback(i) for i in range(4)]
+    with patch.object(handlers, "REPO", repo), patch.object(handlers, "PROFILES", LRUCache(maxsize=8)):
+        start = time.perf_counter()
+        await asyncio.gather(*(handlers.registration(c, AsyncMock()) for c in callbacks))
+        elapsed = time.perf_counter() - start
+    repo.close()
+
+    for c in callbacks:
+        args, kwargs = c.message.answer.call_args
+        assert 'Вы уже зарегестрированы со следующими данными.' in args[0]
+    assert elapsed < 2 * DELAY
+
+
+@pytest.mark.asyncio
+async def test_pool_is_bounded():
+    """Не больше max_workers запросов выполняются одновременно"""
+
+    repo = Repository(SlowClient([]), max_workers=2)
+    start = time.perf_counter()
+    await asyncio.gather(*(repo.day_schedule(day) for day in range(1, 5)))  # разные запросы не объединяются
+    elapsed = time.perf_counter() - start
+    repo.close()
+
+    assert elapsed >= 2 * DELAY
+
+
+@pytest.mark.asyncio
+async def test_get_schedule_single_query():
+    """Расписание на день загружается одним запросом независимо от числа пар"""
+
+    pairs = [{"pair_number": n, "week_type": None, "subject": f"Предмет {n}", "start_time": "09:00:00",
+              "end_time": "10:35:00", "classroom": "П-8", "teacher": "Иванов"} for n in range(1, 6)]
+    client = SlowClient(pairs)
+    client.table = MagicMock(side_effect=client.table)
+    repo = Repository(client)
+    handlers.SCHEDULE_CACHE.invalidate()
+    with patch.object(handlers, "REPO", repo):
+        text = await handlers.get_schedule(1, 'понедельник')
+    repo.close()
+
+    client.table.assert_called_once_with("schedule_full")
+    assert text.count("Предмет:") == 5
+    assert "Преподаватель: Иванов" in text
+
+
+@pytest.mark.asyncio
+async def test_identical_reads_share_one_query():
+    """Одновременные одинаковые чтения ждут один запрос, разные выполняются отдельно"""
+
+    repo = Repository(SlowClient([{"id": 1, "name": "Матан"}]))
+    before = metrics.DB_COLLAPSED.values.get(("subjects",), 0)
+
+    with patch.object(SlowQuery, "execute", autospec=True, side_effect=SlowQuery.execute) as execute:
+        results = await asyncio.gather(*(repo.subjects() for _ in range(20)), repo.teachers())
+        assert execute.call_count == 2
+        assert all(result == [{"id": 1, "name": "Матан"}] for result in results)
+        assert metrics.DB_COLLAPSED.values[("subjects",)] - before == 19
+
+        await repo.subjects()  # после завершения запрос выполняется заново
+        assert execute.call_count == 3 and repo._inflight == {}
+    repo.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_reader_does_not_cancel_shared_query():
+    repo = Repository(SlowClient([{"id": 1}]))
+    first = asyncio.create_task(repo.day_schedule(1))
+    second = asyncio.create_task(repo.day_schedule(1))
+    await asyncio.sleep(DELAY / 4)
+    first.cancel()
+
+    assert await second == [{"id": 1}]
+    assert first.cancelled()
+    repo.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_shared_query_reaches_every_reader():
+    client = MagicMock()
+    client.table.return_value.select.return_value.execute.side_effect = RuntimeError("timeout")
+    repo = Repository(client)
+
+    results = await asyncio.gather(repo.classrooms(), repo.classrooms(), return_exceptions=True)
+    repo.close()
+
+    assert [type(result) for result in results] == [RuntimeError, RuntimeError]
+    assert client.table.return_value.select.return_value.execute.call_count == 1
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+@pytest.mark.asyncio
+async def test_archive_pages_start_from_newest():
+    """Архив открывается на последних заданиях и листается в прошлое, назад - обратно"""
+
+    repo = Repository(FakeSupabase(seed_tables()))
+    today = date.today().isoformat()
+
+    first, more = await repo.homework_page(1, today, True, 4)
+    assert ids(first) == [1009, 1008, 1007, 1006] and more
+    cursor = (first[-1]["due_date"], first[-1]["id"])
+    second, more = await repo.homework_page(1, today, True, 4, cursor)
+    assert ids(second) == [1005, 1004, 1003, 1002] and more
+    cursor = (second[0]["due_date"], second[0]["id"])
+    back, more = await repo.homework_page(1, today, True, 4, cursor, back=True)
+    assert back == first and not more
+
+    upcoming, _ = await repo.homework_page(1, today, False, 2)
+    assert ids(upcoming) == [1010, 1011]
+    repo.close()
@@ -0,0 +1,88 @@
+"""Tests for FSM storages."""
+
+import subprocess
+import sys
+import pytest
+from aiogram.fsm.storage.base import DefaultKeyBuilder, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from Bot.handlers import AddDeadline
+from Bot.storage import DestinyKeyBuilder, SQLiteStorage, create_storage
+
+
+KEY = StorageKey(bot_id=1, chat_id=123, user_id=123)
+
+
+async def check_roundtrip(storage):
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_data(KEY) == {}
+
+    await storage.set_state(KEY, AddDeadline.waiting_for_time)
+    await storage.update_data(KEY, {"date": "2025-06-01"})
+    assert await storage.get_state(KEY) == AddDeadline.waiting_for_time.state
+    assert await storage.get_data(KEY) == {"date": "2025-06-01"}
+
+    await storage.set_state(KEY, None)
+    await storage.set_data(KEY, {})
+    assert await storage.get_state(KEY) is None
+    assert await storage.get_data(KEY) == {}
+
+
+@pytest.mark.asyncio
+async def test_sqlite_roundtrip(tmp_path):
+    await check_roundtrip(SQLiteStorage(tmp_path / "fsm.sqlite3"))
+
+
+@pytest.mark.asyncio
+async def test_sqlite_state_is_shared_between_processes(tmp_path):
+    """Состояние, записанное одним процессом бота, видно другому"""
+
+    path = tmp_path / "fsm.sqlite3"
+    code = f"""
+import asyncio
+from aiogram.fsm.storage.base import DefaultKeyBuilder, StorageKey
+from Bot.storage import SQLiteStorage
+
+storage = SQLiteStorage({str(path)!r})
+key = StorageKey(bot_id=1, chat_id=123, user_id=123)
+asyncio.run(storage.set_state(key, "AddDeadline:waiting_for_title"))
+asyncio.run(storage.set_data(key, {{"date": "2025-06-01", "time": "12:00"}}))
+"""
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+    storage = SQLiteStorage(path)
+    assert await storage.get_state(KEY) == AddDeadline.waiting_for_title.state
+    assert await storage.get_data(KEY) == {"date": "2025-06-01", "time": "12:00"}
+
+
+@pytest.mark.asyncio
+async def test_redis_roundtrip():
+    fakeredis = pytest.importorskip("fakeredis")
+    from aiogram.fsm.storage.redis import RedisStorage
+
+    await check_roundtrip(RedisStorage(redis=fakeredis.aioredis.FakeRedis()))
+
+
+def test_create_storage(tmp_path):
+    assert isinstance(create_storage("memory"), MemoryStorage)
+    assert isinstance(create_storage("sqlite", str(tmp_path / "fsm.sqlite3")), SQLiteStorage)
+    with pytest.raises(ValueError):
+        create_storage("mongo")
+
+
+@pytest.mark.asyncio
+async def test_redis_locale_does_not_touch_dialog_keys():
+    """Язык хранится отдельно, ключи состояний диалогов в redis не меняются"""
+
+    fakeredis = pytest.importorskip("fakeredis")
+    from aiogram.fsm.storage.redis import RedisStorage
+    from Bot.i18n import LocaleStore
+
+    builder = DestinyKeyBuilder()
+    assert builder.build(KEY, "state") == DefaultKeyBuilder().build(KEY, "state")
+    storage = RedisStorage(redis=fakeredis.aioredis.FakeRedis(), key_builder=builder)
+    await storage.set_data(KEY, {"date": "2025-06-01"})
+    await LocaleStore(storage).set(123, "en_US")
+    await storage.set_data(KEY, {})
+
+    assert await LocaleStore(storage).get(123) == "en_US"
@@ -0,0 +1,130 @@
+"""Tests for throttling middleware."""
+
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.types import CallbackQuery, Message, Update
+
+from Bot import metrics
+from Bot.throttling import THROTTLED, ThrottlingMiddleware, TokenBucket, setup_throttling
+
+
+class Clock:
+    """Time that moves only when told."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def press(data, user_id=123, update_id=1):
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "chat_instance": "1",
+            "data": data,
+            "from": {"id": user_id, "is_bot": False, "first_name": "Mario"},
+        },
+    })
+
+
+def text(value, user_id=123, update_id=1):
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 1750000000,
+            "chat": {"id": user_id, "type": "private", "first_name": "Mario"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Mario"},
+            "text": value,
+        },
+    })
+
+
+def make_dispatcher(middleware, calls):
+    router = Router()
+
+    @router.callback_query(F.data.in_({"monday", "tuesday"}), flags={"throttle": "schedule"})
+    async def day(callback: CallbackQuery):
+        calls.append(callback.data)
+        await asyncio.sleep(0.01)
+
+    @router.message(F.text == "/help")
+    async def help_command(message: Message):
+        calls.append(message.text)
+
+    dp = Dispatcher()
+    metrics.setup_metrics(dp)
+    setup_throttling(dp, middleware)
+    dp.include_router(router)
+    return dp
+
+
+def throttled(handler, reason):
+    return THROTTLED.values.get((handler, reason), 0)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=2, burst=3, now=0)
+    assert [bucket.take(0) for _ in range(4)] == [True, True, True, False]
+    assert bucket.take(0.5) and not bucket.take(0.5)
+    assert not bucket.full(1) and bucket.full(2)
+
+
+@pytest.mark.asyncio
+async def test_repeated_presses_are_merged_and_answered():
+    clock, calls = Clock(), []
+    dp = make_dispatcher(ThrottlingMiddleware(window=1, clock=clock), calls)
+    bot = Bot("42:TEST")
+    before = throttled("day", "duplicate")
+
+    with patch.object(CallbackQuery, "answer", AsyncMock()) as answer:
+        # пять одинаковых нажатий, пока первое ещё обрабатывается
+        await asyncio.gather(*(dp.feed_update(bot, press("monday", update_id=i)) for i in range(5)))
+        clock.now += 0.5
+        await dp.feed_update(bot, press("monday", update_id=6))
+        await dp.feed_update(bot, press("tuesday", update_id=7))
+        clock.now += 1
+        await dp.feed_update(bot, press("monday", update_id=8))
+
+    assert calls == ["monday", "tuesday", "monday"]
+    assert throttled("day", "duplicate") - before == 5
+    assert answer.await_count == 5 and answer.await_args.args == (None,)
+
+
+@pytest.mark.asyncio
+async def test_buckets_per_user_and_handler():
+    clock, calls = Clock(), []
+    middleware = ThrottlingMiddleware(rate=1, burst=2, window=0, limits={"schedule": (0.5, 1)}, clock=clock)
+    dp = make_dispatcher(middleware, calls)
+    bot = Bot("42:TEST")
+    before = throttled("help_command", "rate")
+
+    with patch.object(CallbackQuery, "answer", AsyncMock()) as answer:
+        for i in range(4):
+            await dp.feed_update(bot, text("/help", update_id=i))
+        await dp.feed_update(bot, text("/help", user_id=456, update_id=10))
+        await dp.feed_update(bot, press("monday", update_id=11))
+        await dp.feed_update(bot, press("tuesday", update_id=12))  # общая группа schedule
+        clock.now += 2
+        await dp.feed_update(bot, press("tuesday", update_id=13))
+
+    assert calls == ["/help", "/help", "/help", "monday", "tuesday"]
+    assert throttled("help_command", "rate") - before == 2
+    assert answer.await_count == 1 and answer.await_args.args == ("Слишком часто, подождите немного.",)
+
+
+def test_cleanup_forgets_idle_users():
+    clock = Clock()
+    middleware = ThrottlingMiddleware(rate=1, burst=2, clock=clock)
+    middleware.buckets = {(1, "day"): TokenBucket(1, 2, clock.now - 1), (2, "day"): TokenBucket(0.01, 2, clock.now)}
+    middleware.buckets[(2, "day")].tokens = 0
+    middleware.presses = {(1, "monday"): clock.now - 5, (2, "monday"): None}
+
+    clock.now += 61
+    middleware._cleanup(clock.now)
+    assert list(middleware.buckets) == [(2, "day")] and list(middleware.presses) == [(2, "monday")]
@@ -0,0 +1,52 @@
+"""Tests for webhook mode."""
+
+import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestClient, TestServer
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.types import Message
+
+from Bot.webhook import create_app
+
+
+UPDATE = {
+    "update_id": 10001,
+    "message": {
+        "message_id": 1,
+        "date": 1750000000,
+        "chat": {"id": 123, "type": "private", "first_name": "Mario"},
+        "from": {"id": 123, "is_bot": False, "first_name": "Mario", "username": "mario"},
+        "text": "/schedule",
+    },
+}
+
+
+@pytest_asyncio.fixture
+async def client():
+    received = []
+    router = Router()
+
+    @router.message(F.text)
+    async def record(message: Message):
+        received.append(message.text)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    app = create_app(dp, Bot("42:TEST"), "/webhook", secret="s3cr3t", handle_in_background=False)
+    async with TestClient(TestServer(app)) as test_client:
+        test_client.received = received
+        yield test_client
+
+
+@pytest.mark.asyncio
+async def test_update_is_handled(client):
+    response = await client.post("/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "s3cr3t"})
+    assert response.status == 200
+    assert client.received == ["/schedule"]
+
+
+@pytest.mark.asyncio
+async def test_wrong_secret_is_rejected(client):
+    response = await client.post("/webhook", json=UPDATE, headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"})
+    assert response.status == 401
+    assert client.received == []
@@ -0,0 +1,85 @@
+"""Tests for week parity aware schedule views."""
+
+import pytest
+from datetime import date, datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from Bot import handlers
+from Bot.cache import RenderCache
+from Bot.repository import Repository
+from tests.fake_supabase import FakeSupabase, seed_tables
+
+
+@pytest.fixture
+def views():
+    """Fake backend, empty cache and 14.09.2026 08:00, monday of the odd third week."""
+    fake = FakeSupabase(seed_tables())
+    clock = MagicMock(wraps=datetime)
+    clock.now.return_value = handlers.moscow_tz.localize(datetime(2026, 9, 14, 8))
+    with patch.object(handlers, "REPO", Repository(fake)), patch.object(handlers, "SCHEDULE_CACHE", RenderCache(ttl=60)), \
+            patch.object(handlers, "config") as config, patch.object(handlers, "datetime", clock):
+        config.semester_start = date(2026, 9, 1)
+        yield fake
+
+
+def message():
+    msg = MagicMock()
+    msg.answer = AsyncMock()
+    return msg
+
+
+def pair_times(text):
+    return [line for line in text.split("\n") if line.startswith("<b>") and " - " in line]
+
+
+@pytest.mark.asyncio
+async def test_only_pairs_of_the_week_are_shown(views):
+    odd = await handlers.week_days("odd", "ru_RU")
+    even = await handlers.week_days("even", "ru_RU")
+
+    # в понедельник 1 пара по чётным, 2 по нечётным, 3 каждую неделю, 4 по чётным
+    assert odd[1][0] == 2 and "<b>11:00 - 12:35</b> нечётные недели" in odd[1][1]
+    assert even[1][0] == 3 and "11:00" not in even[1][1]
+    assert odd[6] == (0, "В этот день нет пар.")
+
+
+@pytest.mark.asyncio
+async def test_every_week_pairs_without_null(views):
+    for row in views.tables["schedule"]:
+        if row["week_type"] is None:
+            row["week_type"] = ""
+
+    odd = await handlers.week_days("odd", "ru_RU")
+    even = await handlers.week_days("even", "ru_RU")
+
+    assert odd[1][0] == 2 and even[1][0] == 3
+    assert "<b>13:00 - 14:35</b>\n" in odd[1][1] and "<b>13:00 - 14:35</b>\n" in even[1][1]
+
+
+@pytest.mark.asyncio
+async def test_today_tomorrow_week_use_one_query_per_parity(views):
+    today, tomorrow, week = message(), message(), message()
+
+    await handlers.today(today)
+    await handlers.tomorrow(tomorrow)
+    await handlers.week(week)
+
+    assert views.queries == ["schedule_full"]
+    text = today.answer.await_args.args[0]
+    assert text.startswith("<i>Неделя 3, нечётная</i>")
+    assert "понедельник" in text and len(pair_times(text)) == 2
+    assert "вторник" in tomorrow.answer.await_args.args[0]
+    week_text = week.answer.await_args.args[0]
+    assert len(pair_times(week_text)) == 10 and "пятница" in week_text and "суббота" not in week_text
+
+
+@pytest.mark.asyncio
+async def test_tomorrow_in_next_week(views):
+    handlers.datetime.now.return_value = handlers.moscow_tz.localize(datetime(2026, 9, 20, 22))
+    msg = message()
+
+    await handlers.tomorrow(msg)
+
+    text = msg.answer.await_args.args[0]
+    assert text.startswith("<i>Неделя 4, чётная</i>")
+    assert len(pair_times(text)) == 3